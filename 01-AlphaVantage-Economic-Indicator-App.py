@@ -1,6 +1,15 @@
+import asyncio
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from datetime import datetime, timedelta
+from pathlib import Path
+import aiohttp
 import streamlit as st
 import pandas as pd
-import requests
+
+from lttb import downsample
 
 # Streamlit page setup
 st.set_page_config(page_title = 'Economic Indicator App', initial_sidebar_state = 'auto', layout='wide')
@@ -21,7 +30,8 @@ st.divider()
 pages = [
     'Data Table',
     'Graphs',
-    'Summary Stats'
+    'Summary Stats',
+    'Correlations'
 ]
 st.sidebar.subheader('Page Navigation')
 selected_page = st.sidebar.radio('Go to', pages)
@@ -31,6 +41,10 @@ st.sidebar.subheader('Metric Configuration')
 # Config
 API_KEY = st.secrets['ALPHA_VANTAGE_API_KEY'] # safe and cleaner
 BASE_URL = 'https://www.alphavantage.co/query'
+REQUESTS_PER_MINUTE = int(st.secrets.get('ALPHA_VANTAGE_REQUESTS_PER_MINUTE', 5)) # free tier quota
+MAX_RETRIES = 4
+BACKOFF_SECONDS = 15 # doubled on every throttled retry
+PREFETCH_EVERY = timedelta(minutes=10)
 
 # Define economic metrics
 metric = {
@@ -60,27 +74,225 @@ interval = {
 selected_metric = st.sidebar.selectbox('Select a metric', list(metric.keys()))
 selected_interval = interval[selected_metric]
 
-# Cached request
-@st.cache_data(ttl=3600, show_spinner='Fetching data...')
-def econ_indicator(metric: str, interval: str) -> pd.DataFrame:
-    """Fetch and cache Alpha Vantage economic indicator data"""
-    url = f'{BASE_URL}?function={metric}&interval={interval}&datatype=json&apikey={API_KEY}'
-    r = requests.get(url)
-    r.raise_for_status()
-    data = r.json()
+# Local time-series store: one SQLite table of observations for every metric/interval.
+# Alpha Vantage always returns the full history, so the saving comes from not calling
+# it at all until a newer observation can exist, and only appending the new rows.
+DB_PATH = Path('data') / 'economic_indicators.sqlite'
+PERIOD = {
+    'daily': timedelta(days=1),
+    'weekly': timedelta(days=7),
+    'monthly': timedelta(days=31),
+    'quarterly': timedelta(days=92),
+    'semiannual': timedelta(days=183),
+    'annual': timedelta(days=366),
+}
+MIN_REFRESH = timedelta(hours=12) # never ask twice within this window
 
-    if 'data' not in data:
-        raise ValueError(data.get('Note', 'API Error'))
+def db_connect() -> sqlite3.Connection:
+    DB_PATH.parent.mkdir(exist_ok=True)
+    conn = sqlite3.connect(DB_PATH)
+    conn.executescript('''
+        CREATE TABLE IF NOT EXISTS observations (
+            metric TEXT, interval TEXT, date TEXT, value REAL,
+            PRIMARY KEY (metric, interval, date)
+        );
+        CREATE TABLE IF NOT EXISTS refreshes (
+            metric TEXT, interval TEXT, fetched_at TEXT,
+            PRIMARY KEY (metric, interval)
+        );
+    ''')
+    return conn
 
-    # Extract and clean data
+def parse_indicator(data: dict) -> pd.DataFrame:
+    """Turn an Alpha Vantage economic indicator payload into a date/value frame"""
     df = pd.DataFrame(data['data'])
     df['value'] = pd.to_numeric(df['value'], errors='coerce') # df['value'].astype(float)
     df['date'] = pd.to_datetime(df['date']).dt.date
-    return df.sort_values('date', ascending=False)
+    return df
+
+def stored_indicator(metric: str, interval: str) -> pd.DataFrame:
+    """Read an indicator from the local store, most recent first"""
+    with closing(db_connect()) as conn:
+        df = pd.read_sql_query(
+            'SELECT date, value FROM observations WHERE metric = ? AND interval = ? ORDER BY date DESC',
+            conn, params=(metric, interval)
+        )
+    df['date'] = pd.to_datetime(df['date']).dt.date
+    return df
+
+def refresh_due(metric: str, interval: str) -> bool:
+    """True when the store is empty, or a newer observation may have been published since the last fetch"""
+    with closing(db_connect()) as conn:
+        last_date, = conn.execute(
+            'SELECT MAX(date) FROM observations WHERE metric = ? AND interval = ?', (metric, interval)
+        ).fetchone()
+        fetched = conn.execute(
+            'SELECT fetched_at FROM refreshes WHERE metric = ? AND interval = ?', (metric, interval)
+        ).fetchone()
+    if last_date is None or fetched is None:
+        return True
+    now = datetime.now()
+    if now - datetime.fromisoformat(fetched[0]) < MIN_REFRESH:
+        return False
+    return now >= datetime.fromisoformat(last_date) + PERIOD.get(interval, timedelta(days=1))
+
+def refresh_indicator(metric: str, interval: str, df: pd.DataFrame) -> int:
+    """Append observations newer than the last stored date; returns the number of new rows"""
+    with closing(db_connect()) as conn, conn:
+        last_date, = conn.execute(
+            'SELECT MAX(date) FROM observations WHERE metric = ? AND interval = ?', (metric, interval)
+        ).fetchone()
+        new = df if last_date is None else df[df['date'] > datetime.fromisoformat(last_date).date()]
+        conn.executemany(
+            'INSERT OR REPLACE INTO observations VALUES (?, ?, ?, ?)',
+            [(metric, interval, d.isoformat(), v) for d, v in zip(new['date'], new['value'])]
+        )
+        conn.execute(
+            'INSERT OR REPLACE INTO refreshes VALUES (?, ?, ?)',
+            (metric, interval, datetime.now().isoformat(timespec='seconds'))
+        )
+    return len(new)
+
+class TokenBucket:
+    """Async token bucket: up to capacity requests at once, refilled at rate per second"""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+class IndicatorPrefetcher:
+    """Refreshes indicators on a background event loop through one pooled aiohttp session
+
+    Every request, prefetch or on-demand, passes the same token bucket, so together
+    they never exceed the per-minute quota. Throttle notes are retried with backoff.
+    """
+
+    def __init__(self, requests_per_minute: int):
+        self.bucket = TokenBucket(requests_per_minute / 60, requests_per_minute)
+        self.loop = asyncio.new_event_loop()
+        self.session = None
+        self.inflight = {}
+        self.last_prefetch = None
+        self.lock = threading.Lock()
+        threading.Thread(target=self.loop.run_forever, name='indicator-prefetch', daemon=True).start()
+
+    async def fetch(self, metric: str, interval: str) -> pd.DataFrame:
+        """Fetch the full history of an Alpha Vantage economic indicator"""
+        if self.session is None:
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=4),
+                timeout=aiohttp.ClientTimeout(total=30)
+            )
+        params = {'function': metric, 'interval': interval, 'datatype': 'json', 'apikey': API_KEY}
+        for attempt in range(MAX_RETRIES + 1):
+            await self.bucket.acquire()
+            async with self.session.get(BASE_URL, params=params) as r:
+                r.raise_for_status()
+                data = await r.json(content_type=None)
+            if 'data' in data:
+                return parse_indicator(data)
+            # Rate limits come back as HTTP 200 with a 'Note' (or 'Information') message
+            note = data.get('Note') or data.get('Information')
+            if note is None or attempt == MAX_RETRIES:
+                raise ValueError(note or data.get('Error Message', 'API Error'))
+            await asyncio.sleep(BACKOFF_SECONDS * 2 ** attempt)
+
+    async def refresh_async(self, metric: str, interval: str) -> int:
+        df = await self.fetch(metric, interval)
+        return await asyncio.to_thread(refresh_indicator, metric, interval, df)
+
+    def refresh(self, metric: str, interval: str):
+        """Schedule a refresh, sharing any that is already in flight; returns a concurrent Future"""
+        with self.lock:
+            future = self.inflight.get((metric, interval))
+            if future is None or future.done():
+                future = asyncio.run_coroutine_threadsafe(self.refresh_async(metric, interval), self.loop)
+                self.inflight[(metric, interval)] = future
+            return future
+
+    def prefetch(self, series: list[tuple[str, str]]):
+        """Warm every stale series in the background, at most once per PREFETCH_EVERY"""
+        now = datetime.now()
+        if self.last_prefetch is not None and now - self.last_prefetch < PREFETCH_EVERY:
+            return
+        self.last_prefetch = now
+        for metric_name, metric_interval in series:
+            if refresh_due(metric_name, metric_interval):
+                self.refresh(metric_name, metric_interval)
+
+@st.cache_resource
+def load_prefetcher() -> IndicatorPrefetcher:
+    return IndicatorPrefetcher(REQUESTS_PER_MINUTE)
+
+prefetcher = load_prefetcher()
+prefetcher.prefetch([(metric[name], interval[name]) for name in metric])
+
+# Cached request
+@st.cache_data(ttl=3600, show_spinner='Fetching data...')
+def econ_indicator(metric: str, interval: str, version: str = '') -> pd.DataFrame:
+    """Serve an Alpha Vantage indicator from the local store; version only keys the cache
+
+    A stale series is refreshed in the background and its stored rows are served
+    meanwhile; only a series with nothing stored yet waits on the network.
+    """
+    stored = stored_indicator(metric, interval)
+    if not refresh_due(metric, interval):
+        return stored
+    # Joins the prefetch for this series if it is already running
+    future = prefetcher.refresh(metric, interval)
+    if not stored.empty:
+        # The finished refresh bumps store_version(), so the next rerun picks it up
+        return stored
+    future.result()
+    return stored_indicator(metric, interval)
+
+# Aligned panel: every indicator resampled to one frequency, one column per metric
+PANEL_FREQUENCIES = {
+    'Monthly': ('MS', 11), # (pandas frequency, periods an annual value is carried forward)
+    'Quarterly': ('QS', 3),
+    'Annual': ('YS', 0),
+}
+
+def store_version() -> str:
+    """Timestamp of the latest refresh; changes whenever the store may have new rows"""
+    with closing(db_connect()) as conn:
+        version, = conn.execute('SELECT MAX(fetched_at) FROM refreshes').fetchone()
+    return version or ''
+
+@st.cache_data(show_spinner='Aligning indicators...')
+def indicator_panel(freq: str, ffill_limit: int, version: str) -> pd.DataFrame:
+    """Date-aligned wide frame of all stored indicators; version only keys the cache"""
+    with closing(db_connect()) as conn:
+        long = pd.read_sql_query('SELECT metric, interval, date, value FROM observations', conn)
+    names = pd.DataFrame(
+        [(metric[name], interval[name], name) for name in metric],
+        columns=['metric', 'interval', 'name']
+    )
+    long = long.merge(names, on=['metric', 'interval'])
+    long['date'] = pd.to_datetime(long['date'])
+    wide = long.pivot_table(index='date', columns='name', values='value', aggfunc='mean')
+    panel = wide.resample(freq).mean()
+    if ffill_limit:
+        panel = panel.ffill(limit=ffill_limit)
+    return panel
 
 # Main logic
 try: 
-    df = econ_indicator(metric[selected_metric], interval[selected_metric])
+    df = econ_indicator(metric[selected_metric], interval[selected_metric], store_version())
     if df.empty:
         st.warning('No data is available for this indicator.')
         st.stop
@@ -103,7 +315,12 @@ try:
 
     if selected_page == 'Graphs':
         st.subheader(f'{selected_metric} Trend')
-        st.line_chart(df.set_index('date')['value'])
+        chart_df = downsample(df, 'date', 'value')
+        st.line_chart(chart_df.set_index('date')['value'])
+        # downsample drops missing values first, so compare against the observed points only
+        observed = int(df['value'].notna().sum())
+        if len(chart_df) < observed:
+            st.caption(f'Showing {len(chart_df):,} of {observed:,} points; the Data Table page exports the full series')
 
     if selected_page == 'Summary Stats':
         average = round(df['value'].mean(), 2)
@@ -131,6 +348,28 @@ try:
         col1.metric('Earliest date', str(df['date'].min().strftime("%B %Y")))
         col2.metric('Latest date', str(df['date'].max().strftime("%B %Y")))    
 
+    if selected_page == 'Correlations':
+        st.subheader('Indicator Correlations')
+        col1, col2 = st.columns(2)
+        freq, ffill_limit = PANEL_FREQUENCIES[col1.selectbox('Common frequency', list(PANEL_FREQUENCIES))]
+        panel = indicator_panel(freq, ffill_limit, store_version())
+        selected_columns = col2.multiselect('Indicators', list(panel.columns), default=list(panel.columns))
+        if len(selected_columns) < 2:
+            st.info('Select at least two indicators to compare.')
+        else:
+            window = panel[selected_columns].dropna(how='all')
+            panel_start, panel_end = st.slider('Select a panel date range',
+                                               min_value = window.index.min().date(),
+                                               max_value = window.index.max().date(),
+                                               value = (window.index.min().date(), window.index.max().date()))
+            # Slicing the cached panel is cheap; alignment is never redone on slider moves
+            window = window.loc[str(panel_start):str(panel_end)]
+            st.dataframe(window.corr().round(2), use_container_width = True)
+            st.caption('Pearson correlation over periods where both indicators have values')
+
+            st.subheader('Overlay (z-scores)')
+            st.line_chart((window - window.mean()) / window.std())
+
 except Exception as e:
     st.error(f'Failed to load data: {e}')
 
@@ -1,8 +1,22 @@
 import streamlit as st
 import numpy as np
-import PyPDF2
 import faiss
 import hashlib
+import heapq
+import json
+import os
+import re
+import shutil
+import threading
+import time
+import zlib
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from operator import itemgetter
+from pathlib import Path
+from bm25 import BM25Index
+from micro_batch import MicroBatcher
+from pdf_extract import iter_pages
 from sentence_transformers import SentenceTransformer
 from transformers import pipeline
 
@@ -16,74 +30,835 @@ Upload your PDF and ask questions using retrieval-augmented AI pipeline.
 ''')
 
 # Load models
+class ModelLoader:
+    """Loads the embedder and QA pipeline in parallel on background threads
+
+    Attribute access blocks only until that particular model is ready, so the page
+    paints immediately and ingest can start before the QA model has finished loading.
+    """
+
+    specs = {
+        'embedder': (SentenceTransformer, ('all-MiniLM-L6-v2',), {}),
+        'qa_pipeline': (pipeline, ('question-answering',), {'model': 'deepset/roberta-base-squad2'}),
+    }
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.load_seconds = {}
+        self.lock = threading.Lock()
+        self.pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix='model-loader')
+        self.futures = {name: self._submit(name) for name in self.specs}
+
+    def _submit(self, name):
+        factory, args, kwargs = self.specs[name]
+        return self.pool.submit(self._load, name, factory, *args, **kwargs)
+
+    def _load(self, name, factory, *args, **kwargs):
+        model = factory(*args, **kwargs)
+        self.load_seconds[name] = time.perf_counter() - self.started
+        return model
+
+    def ready(self, name):
+        return self.futures[name].done()
+
+    def get(self, name):
+        future = self.futures[name]
+        try:
+            return future.result()
+        except Exception:
+            # A failed load (e.g. a transient download error) is retried on the next
+            # access instead of being re-raised from the cached loader until restart
+            with self.lock:
+                if self.futures[name] is future:
+                    self.futures[name] = self._submit(name)
+            raise
+
+    @property
+    def embedder(self):
+        return self.get('embedder')
+
+    @property
+    def qa_pipeline(self):
+        return self.get('qa_pipeline')
+
 @st.cache_resource
 def load_models():
-    embedder = SentenceTransformer('all-MiniLM-L6-v2')
-    qa_model = pipeline(
-        'question-answering',
-        model='deepset/roberta-base-squad2'   
+    return ModelLoader()
+
+models = load_models()
+
+# Query-time micro-batching shared by all sessions
+MAX_BATCH_SIZE = int(os.environ.get('QA_MAX_BATCH_SIZE', 32))
+MAX_WAIT_MS = float(os.environ.get('QA_MAX_WAIT_MS', 5))
+
+# Ranked QA: one model window per retrieved chunk, with a cap on total context tokens
+QA_MAX_SEQ_LEN = 384      # the pipeline's default window; longer contexts get strided
+QA_TOKEN_BUDGET = 1024    # total context tokens across all retrieved chunks
+ANSWER_MODES = ['Ranked per chunk', 'Concatenated context']
+
+# Retrieval: dense FAISS search, BM25 only (no model call), or both fused by reciprocal rank
+RETRIEVAL_METHODS = {'Hybrid (RRF)': 'hybrid', 'Dense': 'dense', 'Lexical (BM25)': 'lexical'}
+RRF_K = 60          # standard reciprocal-rank-fusion damping constant
+FUSION_DEPTH = 20   # candidates taken from each ranking before fusing
+
+def run_qa_batch(items):
+    results = models.qa_pipeline(
+        question=[r['question'] for r in items],
+        context=[r['context'] for r in items],
+        batch_size=len(items)
+    )
+    # The pipeline unwraps single-item batches
+    return [results] if isinstance(results, dict) else results
+
+@st.cache_resource
+def load_batchers(max_batch_size, max_wait_ms):
+    encode_batcher = MicroBatcher(
+        lambda questions: models.embedder.encode(questions, batch_size=len(questions)),
+        max_batch_size, max_wait_ms, name='encode-batcher'
     )
-    return embedder, qa_model
-    #return pipeline('question-answering', 
-    #                model = 'deepset/roberta-base-squad2',
-    #                framework = 'pt')
+    qa_batcher = MicroBatcher(run_qa_batch, max_batch_size, max_wait_ms, name='qa-batcher')
+    return encode_batcher, qa_batcher
+
+encode_batcher, qa_batcher = load_batchers(MAX_BATCH_SIZE, MAX_WAIT_MS)
+
+# On-disk vector store cache, one directory per SHA-256 of the uploaded PDF.
+# Bump the version whenever chunking changes so stale chunks aren't served.
+CACHE_DIR = Path('.doc_qa_cache') / 'v3'
+
+# Chunking: token windows over the embedder's tokenizer, cut at sentence ends
+CHUNK_OVERLAP_TOKENS = 32
+SENTENCE_END = re.compile(r'[.!?]["\')\]]*\s+')
 
-embedder, qa_pipeline = load_models()
+# Near-duplicate filtering (repeated headers, footers, boilerplate) before embedding:
+# MinHash over word shingles, LSH banding for candidates, then a Jaccard estimate check
+SHINGLE_WORDS = 5
+MINHASH_PERMUTATIONS = 128
+LSH_BANDS = 16                 # 16 bands x 8 rows: candidates from ~0.7 similarity up
+DUPLICATE_THRESHOLD = 0.8
+MERSENNE_PRIME = (1 << 31) - 1
+
+# Index modes: exact flat scan, or approximate IVF-Flat / HNSW for large corpora
+# Compressed modes: 8-bit / float16 scalar quantizer and product quantization
+INDEX_MODES = ['auto', 'flat', 'ivf', 'hnsw', 'sq8', 'fp16', 'pq']
+AUTO_FLAT_MAX_CHUNKS = 5_000     # below this a brute-force scan is fast enough
+AUTO_HNSW_MAX_CHUNKS = 100_000   # above this IVF's smaller memory footprint wins
+PQ_MIN_CHUNKS = 39 * 256         # 8-bit PQ needs >= 39 training points per centroid; below it pq uses sq8
+
+# Indexes whose embedding matrix is at least this large are served memory-mapped from
+# disk, so Streamlit worker processes share the OS page cache instead of private copies
+MMAP_MIN_BYTES = 256 * 2**20
 
 # Helpers
+def iter_page_text(data):
+    for _, text in iter_pages(data):
+        yield text
+
 def extract_text(file):
-    reader = PyPDF2.PdfReader(file)
-    return '\n'.join(
-        page.extract_text() for page in reader.pages if page.extract_text()
-    )
+    data = file.read() if hasattr(file, 'read') else file
+    return '\n'.join(iter_page_text(data))
+
+def iter_chunks(pages, chunk_tokens=None, overlap=CHUNK_OVERLAP_TOKENS, tokenizer=None):
+    """Yield (page_number, chunk) token windows from a stream of (page_number, text)
+
+    Each page is tokenized once with the embedder's tokenizer. Windows are computed
+    as token ranges over one text buffer and cut back to the last sentence end when
+    one falls in the second half of the window, so no chunk exceeds the embedder's
+    token budget. Chunks are slices of the buffer, which is trimmed after every page,
+    so only the unconsumed tail of the document is held in memory.
+    page_number is the page the chunk starts on.
+    """
+    tokenizer = tokenizer or models.embedder.tokenizer
+    chunk_tokens = chunk_tokens or models.embedder.max_seq_length - 2  # room for [CLS]/[SEP]
+    # Capped so the look-back below (at most 2 * overlap) never reaches the window start
+    overlap = min(overlap, chunk_tokens // 4)
 
-def chunk_text(text, chunk_size=500, overlap=50):
-    words = text.split()
-    chunks = []
-    i = 0
-    while i < len(words):
-        chunk = words[i:i + chunk_size]
-        chunks.append(' '.join(chunk))
-        i += chunk_size - overlap
-    return chunks
-
-def build_vector_store(chunks):
-    embeddings = embedder.encode(chunks)
-    index = faiss.IndexFlatL2(embeddings.shape[1])
-    index.add(np.array(embeddings))
+    text = ''
+    tok_start = np.empty(0, dtype=np.int64)   # char offsets of each token in text
+    tok_end = np.empty(0, dtype=np.int64)
+    sentences = np.empty(0, dtype=np.int64)   # token indices where a sentence starts
+    page_start, page_number = np.empty(0, dtype=np.int64), []
+    pos = 0                                   # first token of the next window
+
+    def windows(final):
+        nonlocal pos
+        n = len(tok_start)
+        while n - pos >= chunk_tokens or (final and pos < n):
+            end = min(pos + chunk_tokens, n)
+            if end < n:
+                i = np.searchsorted(sentences, end, side='right') - 1
+                if i >= 0 and sentences[i] > pos + chunk_tokens // 2:
+                    end = int(sentences[i])
+            char_start = tok_start[pos]
+            page = page_number[np.searchsorted(page_start, char_start, side='right') - 1]
+            yield page, text[char_start:tok_end[end - 1]]
+            if end >= n:
+                pos = n
+                break
+            # Start the overlap at a sentence start after this window's: the one just
+            # before end - overlap if that adds at most another overlap's worth, else
+            # the next one after it, else end - overlap itself
+            nxt = end - overlap
+            i = np.searchsorted(sentences, nxt, side='right') - 1
+            if i >= 0 and sentences[i] > pos and sentences[i] >= end - 2 * overlap:
+                nxt = int(sentences[i])
+            elif i + 1 < len(sentences) and sentences[i + 1] < end:
+                nxt = int(sentences[i + 1])
+            pos = max(nxt, pos + 1)
+
+    for page, page_text in pages:
+        base = len(text)
+        text += page_text + '\n'
+        encoding = tokenizer(page_text, add_special_tokens=False,
+                             return_offsets_mapping=True, verbose=False)
+        offsets = np.asarray(encoding['offset_mapping'], dtype=np.int64).reshape(-1, 2) + base
+        first_token = len(tok_start)
+        tok_start = np.concatenate([tok_start, offsets[:, 0]])
+        tok_end = np.concatenate([tok_end, offsets[:, 1]])
+        ends = np.fromiter((m.end() + base for m in SENTENCE_END.finditer(page_text)), dtype=np.int64)
+        sentences = np.concatenate([
+            sentences, [first_token],
+            np.searchsorted(tok_start, ends)
+        ])
+        sentences = np.unique(sentences[sentences < len(tok_start)])
+        page_start = np.append(page_start, base)
+        page_number.append(page)
+
+        yield from windows(final=False)
+
+        # Drop everything before the next window so the buffer only holds the tail
+        if pos:
+            cut = tok_start[pos] if pos < len(tok_start) else len(text)
+            text = text[cut:]
+            tok_start, tok_end = tok_start[pos:] - cut, tok_end[pos:] - cut
+            sentences = sentences[sentences >= pos] - pos
+            keep = max(np.searchsorted(page_start, cut, side='right') - 1, 0)
+            page_start = np.maximum(page_start[keep:] - cut, 0)
+            page_number = page_number[keep:]
+            pos = 0
+
+    yield from windows(final=True)
+
+def chunk_text(text, chunk_tokens=None, overlap=CHUNK_OVERLAP_TOKENS):
+    return [chunk for _, chunk in iter_chunks([(0, text)], chunk_tokens, overlap)]
+
+def embed_chunks(chunks, batch_size=64):
+    """Encode a (possibly lazy) chunk stream batch by batch, returning (chunk list, embeddings)"""
+    chunk_list, batches, batch = [], [], []
+    for chunk in chunks:
+        batch.append(chunk)
+        if len(batch) == batch_size:
+            batches.append(models.embedder.encode(batch))
+            chunk_list.extend(batch)
+            batch = []
+    if batch:
+        batches.append(models.embedder.encode(batch))
+        chunk_list.extend(batch)
+    if not chunk_list:
+        raise ValueError('No extractable text found in the document')
+    return chunk_list, np.vstack(batches).astype('float32')
+
+def resolve_index_mode(mode, n_chunks):
+    if mode == 'pq' and n_chunks < PQ_MIN_CHUNKS:
+        return 'sq8'
+    if mode != 'auto':
+        return mode
+    if n_chunks < AUTO_FLAT_MAX_CHUNKS:
+        return 'flat'
+    if n_chunks < AUTO_HNSW_MAX_CHUNKS:
+        return 'hnsw'
+    return 'ivf'
+
+def build_index(embeddings, mode='flat', nlist=None, hnsw_m=32, ef_construction=80, ids=None):
+    """Build a FAISS index; with ids, vectors are stored under those ids
+
+    IVF keeps ids natively; flat and HNSW are wrapped in an IndexIDMap.
+    """
+    embeddings = np.ascontiguousarray(embeddings, dtype='float32')
+    n, d = embeddings.shape
+    mode = resolve_index_mode(mode, n)
+    if mode == 'ivf':
+        # ~4*sqrt(n) lists, keeping >= 39 training points per centroid
+        nlist = nlist or max(1, min(int(4 * np.sqrt(n)), n // 39))
+        quantizer = faiss.IndexFlatL2(d)
+        index = faiss.IndexIVFFlat(quantizer, d, nlist)
+        index.train(embeddings)
+    elif mode == 'hnsw':
+        index = faiss.IndexHNSWFlat(d, hnsw_m)
+        index.hnsw.efConstruction = ef_construction
+    elif mode in ('sq8', 'fp16'):
+        qtype = faiss.ScalarQuantizer.QT_8bit if mode == 'sq8' else faiss.ScalarQuantizer.QT_fp16
+        index = faiss.IndexScalarQuantizer(d, qtype)
+        index.train(embeddings)
+    elif mode == 'pq':
+        # 2 dims per 8-bit sub-quantizer (8x smaller than float32); FAISS's PQ
+        # search kernels need 8 bits, so small corpora resolve to sq8 instead
+        m = next(m for m in range(d // 2, 0, -1) if d % m == 0)
+        index = faiss.IndexPQ(d, m, 8)
+        index.train(embeddings)
+    else:
+        index = faiss.IndexFlatL2(d)
+    if ids is not None:
+        # IndexIDMap over IVF breaks on remove_ids (IVF doesn't renumber), so IVF adds ids itself
+        if mode != 'ivf':
+            index = faiss.IndexIDMap(index)
+        index.add_with_ids(embeddings, ids)
+    else:
+        index.add(embeddings)
+    return index
+
+def search_params(index, nprobe=8, ef_search=64):
+    """Per-query FAISS search parameters, so sessions sharing an index don't mutate it"""
+    if isinstance(index, faiss.IndexIDMap):
+        index = faiss.downcast_index(index.index)
+    if isinstance(index, faiss.IndexIVF):
+        return faiss.SearchParametersIVF(nprobe=nprobe)
+    if isinstance(index, faiss.IndexHNSW):
+        return faiss.SearchParametersHNSW(efSearch=ef_search)
+    return None
+
+def search_index(index, queries, k, nprobe=8, ef_search=64):
+    params = search_params(index, nprobe, ef_search)
+    if params is None:
+        return index.search(queries, k)
+    return index.search(queries, k, params=params)
+
+def index_report(embeddings, queries=None, k=3, n_queries=200, nprobe=8, ef_search=64, seed=0):
+    """Recall@k, per-query latency and bytes/vector of each index mode against the flat baseline
+
+    queries: embedded benchmark questions; defaults to perturbed samples of the stored vectors
+    Modes that can't be trained on this many vectors (pq below PQ_MIN_CHUNKS) are skipped.
+    """
+    n = len(embeddings)
+    if queries is None:
+        rng = np.random.default_rng(seed)
+        sample = rng.choice(n, size=min(n_queries, n), replace=False)
+        # Perturb stored vectors so queries don't trivially match themselves
+        noise = rng.normal(scale=0.05, size=(len(sample), embeddings.shape[1]))
+        queries = embeddings[sample] + noise
+    queries = np.ascontiguousarray(queries, dtype='float32')
+    k = min(k, n)
+
+    rows = []
+    baseline = None
+    for mode in INDEX_MODES[1:]:
+        if resolve_index_mode(mode, n) != mode:
+            continue
+        start = time.perf_counter()
+        index = build_index(embeddings, mode)
+        build_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        _, ids = search_index(index, queries, k, nprobe, ef_search)
+        query_ms = (time.perf_counter() - start) * 1000 / len(queries)
+        if baseline is None:
+            baseline = ids
+        hits = sum(len(set(row) & set(ref)) for row, ref in zip(ids, baseline))
+        rows.append({
+            'mode': mode,
+            'recall@k': hits / baseline.size,
+            'ms/query': query_ms,
+            'build ms': build_ms,
+            'bytes/vector': faiss.serialize_index(index).nbytes / n,
+        })
+    return rows
+
+def mmap_flags(mode):
+    # IVF maps its inverted lists (OnDiskInvertedLists); the others map their flat codes
+    if mode == 'ivf':
+        return faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY
+    return faiss.IO_FLAG_MMAP_IFC
+
+def load_index(index_path, mode, mmap=False):
+    return faiss.read_index(str(index_path), mmap_flags(mode) if mmap else 0)
+
+def build_vector_store(chunks, mode='flat', index_path=None):
+    """Embed chunks and index them; with index_path the index is written there and served memory-mapped"""
+    _, embeddings = embed_chunks(chunks)
+    index = build_index(embeddings, mode)
+    if index_path is not None:
+        faiss.write_index(index, str(index_path))
+        index = load_index(index_path, resolve_index_mode(mode, len(embeddings)), mmap=True)
     return index, embeddings
 
-def retrieve_chunks(question, chunks, index, k=3):
-    q_embedding = embedder.encode([question])
-    distances, indices = index.search(np.array(q_embedding), k)
-    return [chunks[i] for i in indices[0]]
+class NearDuplicateFilter:
+    """Streaming MinHash-LSH filter that flags chunks nearly identical to one already seen"""
+
+    def __init__(self, threshold=DUPLICATE_THRESHOLD, num_perm=MINHASH_PERMUTATIONS,
+                 bands=LSH_BANDS, shingle_words=SHINGLE_WORDS, seed=0):
+        rng = np.random.default_rng(seed)
+        self.a = rng.integers(1, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_words = shingle_words
+        self.buckets = defaultdict(list)   # (band, band signature) -> signatures kept
+        self.removed = 0
+
+    def signature(self, text):
+        words = text.lower().split()
+        n = max(1, len(words) - self.shingle_words + 1)
+        shingles = np.fromiter(
+            (zlib.crc32(' '.join(words[i:i + self.shingle_words]).encode()) for i in range(n)),
+            dtype=np.uint64, count=n
+        ) % MERSENNE_PRIME
+        # Universal hashing (a*x + b) mod p; a, x < 2^31 so the product fits in uint64
+        return ((np.outer(self.a, shingles) + self.b[:, None]) % MERSENNE_PRIME).min(axis=1)
+
+    def is_duplicate(self, text):
+        """Check text against everything kept so far; unseen text is remembered"""
+        sig = self.signature(text)
+        keys = [(band, sig[band * self.rows:(band + 1) * self.rows].tobytes())
+                for band in range(self.bands)]
+        for key in keys:
+            for other in self.buckets.get(key, ()):
+                if np.mean(sig == other) >= self.threshold:
+                    self.removed += 1
+                    return True
+        for key in keys:
+            self.buckets[key].append(sig)
+        return False
+
+def ingest_pdf(data, dedup=True):
+    """Stream pages -> chunks -> embeddings so encoding starts while later pages are parsed
+
+    Near-duplicate chunks are dropped before they reach the embedder.
+    Returns (chunks, pages, embeddings, duplicates_removed) where pages[i] is the
+    1-based page chunk i starts on.
+    """
+    pages = []
+    duplicates = NearDuplicateFilter() if dedup else None
+    def chunk_stream():
+        for page, chunk in iter_chunks(iter_pages(data)):
+            if duplicates is not None and duplicates.is_duplicate(chunk):
+                continue
+            pages.append(page + 1)
+            yield chunk
+    chunks, embeddings = embed_chunks(chunk_stream())
+    removed = duplicates.removed if duplicates is not None else 0
+    return chunks, np.asarray(pages, dtype='int32'), embeddings, removed
+
+def embed_query(question):
+    return np.asarray(encode_batcher(question), dtype='float32').reshape(1, -1)
+
+def truncate_to_tokens(text, max_tokens):
+    """Cut text to its first max_tokens QA-tokenizer tokens"""
+    encoding = models.qa_pipeline.tokenizer(
+        text, add_special_tokens=False, truncation=True,
+        max_length=max_tokens, return_offsets_mapping=True
+    )
+    offsets = encoding['offset_mapping']
+    if len(offsets) < max_tokens:
+        return text, len(offsets)
+    return text[:offsets[-1][1]], len(offsets)
+
+def answer_ranked(question, hits, token_budget=QA_TOKEN_BUDGET):
+    """Run QA over each retrieved chunk as one batch and return the best-scoring span
+
+    Each context is truncated to fit a single model window next to the question, and
+    chunks stop being added once token_budget is spent, so latency is bounded by
+    len(hits) windows no matter how large the chunks are.
+    """
+    question_tokens = len(models.qa_pipeline.tokenizer(question, add_special_tokens=False)['input_ids'])
+    window = QA_MAX_SEQ_LEN - question_tokens - 4  # <s> q </s></s> c </s>
+    requests, used_hits = [], []
+    for hit in hits:
+        max_tokens = min(window, token_budget)
+        if max_tokens <= 0:
+            break
+        context, n_tokens = truncate_to_tokens(hit['text'], max_tokens)
+        token_budget -= n_tokens
+        requests.append({'question': question, 'context': context})
+        used_hits.append(hit)
+
+    # Submit together so the batcher runs them as one forward pass
+    futures = [qa_batcher.submit(request) for request in requests]
+    best = None
+    for hit, future in zip(used_hits, futures):
+        result = future.result()
+        if best is None or result['score'] > best['score']:
+            best = {**result, 'hit': hit}
+    return best
+
+def build_bm25(chunks, ids=None):
+    bm25 = BM25Index()
+    bm25.add_many(range(len(chunks)) if ids is None else ids, chunks)
+    return bm25
+
+def dense_ids(question, index, k, nprobe=8, ef_search=64):
+    _, ids = search_index(index, embed_query(question), k, nprobe, ef_search)
+    return [int(i) for i in ids[0] if i != -1]
+
+def reciprocal_rank_fusion(rankings, k, rrf_k=RRF_K):
+    scores = defaultdict(float)
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking):
+            scores[doc_id] += 1 / (rrf_k + rank + 1)
+    return [doc_id for doc_id, _ in heapq.nlargest(k, scores.items(), key=itemgetter(1))]
+
+def rank_ids(question, index, bm25, method='dense', k=3, nprobe=8, ef_search=64):
+    """Ids of the top-k chunks; 'lexical' never calls the embedder"""
+    if method == 'lexical':
+        return [doc_id for doc_id, _ in bm25.search(question, k)]
+    if method == 'dense':
+        return dense_ids(question, index, k, nprobe, ef_search)
+    depth = max(k, FUSION_DEPTH)
+    return reciprocal_rank_fusion([
+        dense_ids(question, index, depth, nprobe, ef_search),
+        [doc_id for doc_id, _ in bm25.search(question, depth)],
+    ], k)
+
+def retrieve_chunks(question, chunks, index, k=3, nprobe=8, ef_search=64, pages=None, document=None,
+                    bm25=None, method='dense'):
+    """Return the top-k chunks as hits: {'text', 'document', 'page'}"""
+    return [
+        {
+            'text': chunks[i],
+            'document': document,
+            'page': int(pages[i]) if pages is not None else None,
+        }
+        for i in rank_ids(question, index, bm25, method, k, nprobe, ef_search)
+    ]
+
+def retrieval_report(chunks, index, bm25, k=3, n_queries=50, span_words=10, nprobe=8, ef_search=64, seed=0):
+    """Hit rate@k and latency of each retrieval method
+
+    Queries are random word spans cut from sampled chunks; a hit means the source
+    chunk is in the top k.
+    """
+    rng = np.random.default_rng(seed)
+    queries = []
+    for i in rng.choice(len(chunks), size=min(n_queries, len(chunks)), replace=False):
+        words = chunks[i].split()
+        start = rng.integers(0, max(1, len(words) - span_words))
+        queries.append((int(i), ' '.join(words[start:start + span_words])))
+
+    rows = []
+    for label, method in RETRIEVAL_METHODS.items():
+        hits = 0
+        start = time.perf_counter()
+        for source, query in queries:
+            hits += source in rank_ids(query, index, bm25, method, k, nprobe, ef_search)
+        rows.append({
+            'method': label,
+            'hit rate@k': hits / len(queries),
+            'ms/query': (time.perf_counter() - start) * 1000 / len(queries),
+        })
+    return rows
+
+class DocumentCorpus:
+    """Many documents sharing one FAISS IndexIDMap
+
+    Each document's vectors get their own id range, so a document can be added or
+    removed without re-embedding the others. The raw embeddings are kept so the
+    index can be rebuilt when the resolved index mode changes, or on removal from
+    HNSW, whose graph doesn't support deletion.
+    """
+
+    def __init__(self, mode='auto'):
+        self.mode = mode
+        self.index = None
+        self.index_mode = None
+        self.next_id = 0
+        self.documents = {}  # digest -> {'name', 'ids', 'embeddings'}
+        self.records = {}    # vector id -> (document name, page, chunk text)
+        self.bm25 = BM25Index()
+
+    def __contains__(self, digest):
+        return digest in self.documents
+
+    def __len__(self):
+        return len(self.records)
+
+    def set_mode(self, mode):
+        if mode != self.mode:
+            self.mode = mode
+            self._rebuild()
+
+    def add(self, digest, name, chunks, pages, embeddings):
+        ids = np.arange(self.next_id, self.next_id + len(chunks), dtype='int64')
+        self.next_id += len(chunks)
+        self.documents[digest] = {'name': name, 'ids': ids, 'embeddings': embeddings}
+        for i, page, chunk in zip(ids, pages, chunks):
+            self.records[int(i)] = (name, int(page), chunk)
+        self.bm25.add_many(ids, chunks)
+        if self.index is None or resolve_index_mode(self.mode, len(self)) != self.index_mode:
+            self._rebuild()
+        else:
+            self.index.add_with_ids(np.ascontiguousarray(embeddings, dtype='float32'), ids)
+
+    def remove(self, digest):
+        doc = self.documents.pop(digest)
+        for i in doc['ids']:
+            del self.records[int(i)]
+            self.bm25.remove(int(i))
+        if self.index_mode == 'hnsw' or resolve_index_mode(self.mode, len(self)) != self.index_mode:
+            self._rebuild()
+        else:
+            self.index.remove_ids(doc['ids'])
+
+    def _rebuild(self):
+        if not self.documents:
+            self.index, self.index_mode = None, None
+            return
+        embeddings = np.vstack([doc['embeddings'] for doc in self.documents.values()])
+        ids = np.concatenate([doc['ids'] for doc in self.documents.values()])
+        self.index_mode = resolve_index_mode(self.mode, len(ids))
+        self.index = build_index(embeddings, self.index_mode, ids=ids)
+
+    def search(self, question, k=3, nprobe=8, ef_search=64, method='dense'):
+        if self.index is None:
+            return []
+        hits = []
+        for i in rank_ids(question, self.index, self.bm25, method, k, nprobe, ef_search):
+            name, page, text = self.records[i]
+            hits.append({'text': text, 'document': name, 'page': page})
+        return hits
+
+def file_digest(data):
+    return hashlib.sha256(data).hexdigest()
+
+def load_cached_embeddings(digest, mmap=False):
+    path = CACHE_DIR / digest
+    if not (path / 'pages.npy').exists():
+        return None
+    chunks = json.loads((path / 'chunks.json').read_text(encoding='utf-8'))
+    pages = np.load(path / 'pages.npy')
+    embeddings = np.load(path / 'embeddings.npy', mmap_mode='r' if mmap else None)
+    return chunks, pages, embeddings
+
+def load_cached_meta(digest):
+    path = CACHE_DIR / digest / 'meta.json'
+    return json.loads(path.read_text(encoding='utf-8')) if path.exists() else {}
+
+def cached_embeddings_bytes(digest):
+    path = CACHE_DIR / digest / 'embeddings.npy'
+    return path.stat().st_size if path.exists() else 0
+
+def save_cached_embeddings(digest, chunks, pages, embeddings, meta=None):
+    # Write into a temp dir and rename so a crash never leaves half an entry
+    path = CACHE_DIR / digest
+    tmp_path = CACHE_DIR / f'{digest}.tmp'
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    tmp_path.mkdir(parents=True)
+    (tmp_path / 'chunks.json').write_text(json.dumps(chunks), encoding='utf-8')
+    np.save(tmp_path / 'pages.npy', pages)
+    np.save(tmp_path / 'embeddings.npy', embeddings)
+    (tmp_path / 'meta.json').write_text(json.dumps(meta or {}), encoding='utf-8')
+    shutil.rmtree(path, ignore_errors=True)
+    tmp_path.rename(path)
+
+@st.cache_resource(max_entries=16, show_spinner=False)
+def get_embeddings(digest, _data, float16=False, mmap=False):
+    """Return (chunks, pages, embeddings) for a PDF, embedding it only on a cache miss
+
+    The disk copy stays float32; with float16 the resident matrix is half the size.
+    With mmap the matrix is a read-only memory map of the disk copy instead (float16
+    is ignored, since casting would materialise a private copy).
+    """
+    cached = load_cached_embeddings(digest, mmap)
+    if cached is None:
+        chunks, pages, embeddings, removed = ingest_pdf(_data)
+        save_cached_embeddings(digest, chunks, pages, embeddings, {'duplicates_removed': removed})
+        cached = (chunks, pages, embeddings)
+        if mmap:
+            # Swap the private copy for a map of the file just written
+            cached = load_cached_embeddings(digest, mmap)
+    chunks, pages, embeddings = cached
+    if float16 and not mmap:
+        embeddings = embeddings.astype('float16')
+    return chunks, pages, embeddings
+
+@st.cache_resource(max_entries=16, show_spinner=False)
+def get_vector_store(digest, _data, mode='auto', float16=False, mmap=False):
+    """Return (index, chunks, pages, embeddings), building the index for a mode from cached embeddings"""
+    chunks, pages, embeddings = get_embeddings(digest, _data, float16, mmap)
+    mode = resolve_index_mode(mode, len(chunks))
+    index_path = CACHE_DIR / digest / f'index_{mode}.faiss'
+    if not index_path.exists():
+        index = build_index(embeddings, mode)
+        # Rename into place so other workers never read or map a half-written file
+        tmp_path = index_path.with_name(f'{index_path.name}.{os.getpid()}.tmp')
+        faiss.write_index(index, str(tmp_path))
+        tmp_path.replace(index_path)
+        if not mmap:
+            return index, chunks, pages, embeddings
+        del index
+    return load_index(index_path, mode, mmap), chunks, pages, embeddings
+
+@st.cache_resource(max_entries=16, show_spinner=False)
+def get_bm25(digest, _chunks):
+    return build_bm25(_chunks)
+
+@st.cache_data(show_spinner='Comparing retrieval methods...')
+def cached_retrieval_report(digest, index_mode, _chunks, _index, _bm25, nprobe, ef_search):
+    return retrieval_report(_chunks, _index, _bm25, nprobe=nprobe, ef_search=ef_search)
+
+@st.cache_data(show_spinner='Benchmarking index modes...')
+def cached_index_report(digest, _embeddings, nprobe, ef_search, questions=()):
+    queries = models.embedder.encode(list(questions)) if questions else None
+    return index_report(_embeddings, queries, nprobe=nprobe, ef_search=ef_search)
 
 # App logic
-uploaded_file = st.sidebar.file_uploader("Upload a PDF", type=["pdf"])
+corpus_mode = st.sidebar.radio('Mode', ['Single document', 'Corpus'],
+                               help='Corpus mode searches across every uploaded PDF')
+uploaded_files = st.sidebar.file_uploader("Upload a PDF", type=["pdf"],
+                                          accept_multiple_files=corpus_mode == 'Corpus')
+if corpus_mode == 'Corpus':
+    uploaded_files = uploaded_files or []
+else:
+    uploaded_files = [uploaded_files] if uploaded_files else []
+st.sidebar.divider()
+st.sidebar.subheader('Index Configuration')
+index_mode = st.sidebar.selectbox('Index mode', INDEX_MODES,
+                                  help='auto picks flat, HNSW or IVF from the chunk count')
+nprobe = st.sidebar.slider('IVF nprobe', 1, 128, 8)
+ef_search = st.sidebar.slider('HNSW efSearch', 16, 512, 64)
+retrieval_method = RETRIEVAL_METHODS[st.sidebar.selectbox(
+    'Retrieval method', list(RETRIEVAL_METHODS),
+    help='Lexical answers keyword lookups (part numbers, clause ids) without an embedding call'
+)]
+float16 = st.sidebar.checkbox('Store embeddings as float16',
+                              help='Halves the in-memory embedding matrix; pair with sq8/fp16/pq to compress the index too')
+mmap_index = st.sidebar.checkbox(
+    'Memory-map index from disk',
+    help=f'Always on for documents whose embeddings exceed {MMAP_MIN_BYTES // 2**20} MB'
+)
+answer_mode = st.sidebar.radio('Answer mode', ANSWER_MODES,
+                               help='Ranked runs the QA model on each chunk separately and keeps the best-scoring span')
+st.sidebar.caption(
+    f'Query batching: up to {MAX_BATCH_SIZE} requests / {MAX_WAIT_MS:g} ms, '
+    f'mean batch {qa_batcher.mean_batch_size:.1f}'
+)
+
+def wait_for_model(name, label):
+    if not models.ready(name):
+        with st.spinner(f'Loading {label}...'):
+            getattr(models, name)
+
+def cold_start_summary():
+    labels = {'embedder': 'embedder', 'qa_pipeline': 'QA model'}
+    parts = []
+    for name, label in labels.items():
+        if name in models.load_seconds:
+            parts.append(f'{label} ready in {models.load_seconds[name]:.1f}s')
+        else:
+            parts.append(f'{label} loading...')
+    return 'Cold start: ' + ', '.join(parts)
+
+def render_hits(question, hits):
+    wait_for_model('qa_pipeline', 'QA model')
+    with st.spinner('Searching for answers...'):
+        if answer_mode == 'Ranked per chunk':
+            answers = answer_ranked(question, hits)
+        else:
+            context = ' '.join(hit['text'] for hit in hits)
+            answers = qa_batcher({'question': question, 'context': context})
+    st.subheader('Answer')
+    if answers is None:
+        st.warning('No answer found in the retrieved context.')
+    else:
+        st.write(answers['answer'])
+        if 'hit' in answers:
+            hit = answers['hit']
+            st.caption(f"Score {answers['score']:.3f} | {hit['document']}, page {hit['page']}")
 
-if uploaded_file:
+    with st.expander('Retrieved Context:'):
+        for i, hit in enumerate(hits, 1):
+            st.markdown(f"**Chunk {i}** ({hit['document']}, page {hit['page']}): {hit['text']}")
+
+if uploaded_files and corpus_mode == 'Single document':
+    uploaded_file = uploaded_files[0]
+    file_bytes = uploaded_file.getvalue()
+    wait_for_model('embedder', 'embedding model')
     with st.spinner('Processing document...'):
-        text = extract_text(uploaded_file)
-        chunks = chunk_text(text)
-        index, _ = build_vector_store(chunks)
+        try:
+            digest = file_digest(file_bytes)
+            use_mmap = mmap_index or cached_embeddings_bytes(digest) >= MMAP_MIN_BYTES
+            index, chunks, pages, embeddings = get_vector_store(digest, file_bytes, index_mode,
+                                                                float16, use_mmap)
+            bm25 = get_bm25(digest, chunks)
+        except ValueError as e:
+            st.error(f'Failed to process document: {e}')
+            st.stop()
 
     st.success('Document processed successfully!')
+    removed = load_cached_meta(digest).get('duplicates_removed', 0)
+    st.caption(f'{len(chunks)} chunks indexed with {type(index).__name__}, '
+               f'{removed} near-duplicate chunks removed before embedding')
+
+    st.caption(f'Embedding matrix: {embeddings.nbytes / 1e6:.1f} MB ({embeddings.dtype}'
+               f"{', memory-mapped' if use_mmap else ''})")
+
+    with st.expander('Index recall vs. latency'):
+        benchmark_questions = st.text_area(
+            'Benchmark questions (one per line)',
+            help='Leave empty to query with perturbed samples of the document\'s own chunks'
+        )
+        if st.button('Run benchmark'):
+            questions = tuple(q.strip() for q in benchmark_questions.splitlines() if q.strip())
+            report = cached_index_report(digest, embeddings, nprobe, ef_search, questions)
+            st.dataframe(report, use_container_width=True)
+            st.caption('Recall@3 of each mode measured against the exact flat index')
+            if len(chunks) < PQ_MIN_CHUNKS:
+                st.caption(f'pq is skipped: it needs at least {PQ_MIN_CHUNKS:,} chunks to train, '
+                           'and resolves to sq8 below that')
+
+    with st.expander('Retrieval method comparison'):
+        if st.button('Compare methods'):
+            report = cached_retrieval_report(digest, index_mode, chunks, index, bm25, nprobe, ef_search)
+            st.dataframe(report, use_container_width=True)
+            st.caption('Queries are 10-word spans from random chunks; a hit means the source chunk ranked in the top 3')
 
     question = st.text_input('Ask a question about the document')
 
     if question:
-        with st.spinner('Searching for answers...'):
-            relevant_chunks = retrieve_chunks(question, chunks, index)
-            context = ' '.join(relevant_chunks)
-            answers = qa_pipeline(
-                question=question,
-                context=context
-            )
-        st.subheader('Answer')
-        st.write(answers['answer'])
-        
-        with st.expander('Retrieved Context:'):
-            for i, chunk in enumerate(relevant_chunks, 1):
-                st.markdown(f'**Chunk {i}:** {chunk}')
+        hits = retrieve_chunks(question, chunks, index, nprobe=nprobe, ef_search=ef_search,
+                               pages=pages, document=uploaded_file.name,
+                               bm25=bm25, method=retrieval_method)
+        render_hits(question, hits)
+elif uploaded_files:
+    if 'corpus' not in st.session_state:
+        st.session_state.corpus = DocumentCorpus(index_mode)
+    corpus = st.session_state.corpus
+    corpus.set_mode(index_mode)
+
+    wait_for_model('embedder', 'embedding model')
+
+    # Sync the corpus with the uploader: embed new files, drop removed ones
+    uploaded = {file_digest(f.getvalue()): f for f in uploaded_files}
+    for digest in [d for d in corpus.documents if d not in uploaded]:
+        corpus.remove(digest)
+    with st.spinner('Processing documents...'):
+        for digest, f in uploaded.items():
+            if digest in corpus:
+                continue
+            try:
+                chunks, pages, embeddings = get_embeddings(digest, f.getvalue(), float16)
+            except ValueError as e:
+                st.error(f'Failed to process {f.name}: {e}')
+                continue
+            corpus.add(digest, f.name, chunks, pages, embeddings)
+
+    st.success(f'{len(corpus.documents)} documents, {len(corpus)} chunks indexed')
+    st.dataframe(
+        [
+            {
+                'document': doc['name'],
+                'chunks': len(doc['ids']),
+                'duplicates removed': load_cached_meta(digest).get('duplicates_removed', 0),
+            }
+            for digest, doc in corpus.documents.items()
+        ],
+        use_container_width=True
+    )
+
+    question = st.text_input('Ask a question about the corpus')
+
+    if question:
+        hits = corpus.search(question, nprobe=nprobe, ef_search=ef_search, method=retrieval_method)
+        render_hits(question, hits)
 else:
-    st.info('Please upload a PDF document to get started.')
\ No newline at end of file
+    st.info('Please upload a PDF document to get started.')
+
+st.divider()
+st.caption(f'AI Document Q&A | {cold_start_summary()}')
@@ -3,6 +3,7 @@ from datetime import datetime
 from vega_datasets import data
 import streamlit as st
 import altair as alt
+import pandas as pd
 
 # Set Streamlit page config
 st.set_page_config(page_title = 'Seattle Weather App', layout = 'wide')
@@ -15,6 +16,7 @@ from the Vega Altair Datasets package.
 pages = [
     'Overview',
     'Year Comparison',
+    'City Comparison',
     'Raw Data'
 ]
 st.sidebar.subheader('Page Navigation')
@@ -26,57 +28,50 @@ def load_weather_data():
 
 full_df = load_weather_data()
 
+# Metric name -> (source column, aggregation) for the per-year overview table
+YEARLY_AGGREGATES = {
+    'max_temp': ('temp_max', 'max'),
+    'min_temp': ('temp_min', 'min'),
+    'max_precip': ('precipitation', 'max'),
+    'min_precip': ('precipitation', 'min'),
+    'max_wind': ('wind', 'max'),
+    'min_wind': ('wind', 'min'),
+}
+
 @st.cache_data
-def yearly_metrics_with_deltas(df, year):
-    year_df = df[df['date'].dt.year == year]
-    prev_df = df[df['date'].dt.year == year - 1]
-    
-    metrics = {
-        'max_temp': year_df['temp_max'].max(),
-        'min_temp': year_df['temp_min'].min(),        
-        'max_precip': year_df['precipitation'].max(),
-        'min_precip': year_df['precipitation'].min(),
-        'max_wind': year_df['wind'].max(),
-        'min_wind': year_df['wind'].min(),
-        'most_weather': year_df['weather'].value_counts().head(1).reset_index()['weather'][0].upper(),
-        'least_weather': year_df['weather'].value_counts().tail(1).reset_index()['weather'][0].upper()
-    }
+def yearly_summary():
+    """One row per year: overview metrics, modal weather, and deltas against the previous year"""
+    df = load_weather_data()
+    by_year = df.groupby(df['date'].dt.year.rename('year'))
+    summary = by_year.agg(**YEARLY_AGGREGATES)
 
-    if prev_df.empty:
-        deltas = {
-            'max_temp': None,
-            'min_temp': None,
-            'max_precip': None,
-            'min_precip': None,
-            'max_wind': None,
-            'min_wind': None,
-
-        }
-    else:
-        deltas = {
-            'max_temp': metrics['max_temp'] - prev_df['temp_max'].max(),
-            'min_temp': metrics['min_temp'] - prev_df['temp_min'].min(),
-            'max_precip': metrics['max_precip'] - prev_df['precipitation'].max(),
-            'min_precip': metrics['min_precip'] - prev_df['precipitation'].min(),
-            'max_wind': metrics['max_wind'] - prev_df['wind'].max(),
-            'min_wind': metrics['min_wind'] - prev_df['wind'].min()
-        }
-
-    return metrics, deltas
+    weather_counts = by_year['weather'].value_counts().unstack(fill_value = 0)
+    summary['most_weather'] = weather_counts.idxmax(axis = 1).str.upper()
+    summary['least_weather'] = weather_counts.replace(0, float('nan')).idxmin(axis = 1).str.upper()
+
+    # Previous year's row shifted onto each year; NaN where that year isn't in the data
+    prev = summary[list(YEARLY_AGGREGATES)].reindex(summary.index - 1).set_axis(summary.index)
+    for name in YEARLY_AGGREGATES:
+        summary[f'{name}_delta'] = summary[name] - prev[name]
+    return summary
+
+year_summary = yearly_summary()
 
 selected_year = st.selectbox(
     'Select year for summary',
-    sorted(full_df['date'].dt.year.unique(), reverse=True)
+    sorted(year_summary.index, reverse=True)
 )
 prev_year = selected_year - 1
 st.divider()
 
-def render_overview(df, year):
-    # metrics = yearly_metrics(full_df, selected_year)
-    metrics, deltas = yearly_metrics_with_deltas(full_df, selected_year)
-    st.subheader(f'{selected_year} Overview')
+def render_overview(summary, year):
+    row = summary.loc[year]
+    metrics = row.to_dict()
+    deltas = {name: None if pd.isna(row[f'{name}_delta']) else round(row[f'{name}_delta'], 2)
+              for name in YEARLY_AGGREGATES}
+    st.subheader(f'{year} Overview')
 
-    if deltas is None:
+    if year - 1 not in summary.index:
         st.info("Year-over-year comparisons are not available for the first year in the dataset.")
 
     with st.container(horizontal = True, gap = 'medium'):
@@ -86,36 +81,36 @@ def render_overview(df, year):
             st.metric('Max temperature',
                 f"{metrics['max_temp']:0.1f}C",
                 # delta = f"{metrics['max_temp'] - max_temp_2014:0.1f}C",
-                delta = round(deltas['max_temp'], 2),
+                delta = deltas['max_temp'],
                 width = 'content'
             )
         with cols[1]:
             st.metric('Min temperature', 
                       f"{metrics['min_temp']:0.1f}C",
-                      delta = round(metrics['min_temp'], 2),
+                      delta = deltas['min_temp'],
                       width = 'content'
             )
         with cols[2]:
             st.metric('Max preciptation',
                 f"{metrics['max_precip']:0.1f}mm",
-                delta = round(deltas['max_precip'], 2),
+                delta = deltas['max_precip'],
                 width = 'content'
             )
         with cols[3]:
             st.metric('Min preciptation', 
                       f"{metrics['min_precip']:0.1f}mm",
-                      delta = round(metrics['min_precip'], 2),
+                      delta = deltas['min_precip'],
                       width = 'content'
             )
         with cols[0]:
             st.metric('Max wind',
                       f"{metrics['max_wind']:0.1f}m/s",
-                      delta = round(metrics['max_wind'], 2),
+                      delta = deltas['max_wind'],
                       width = 'content')
         with cols[1]:
             st.metric('Min wind',
                       f"{metrics['min_wind']:0.1f}m/s",
-                      delta = round(metrics['min_wind'], 2),
+                      delta = deltas['min_wind'],
                       width = 'content')
         with cols[2]:
             st.metric('Most common weather',
@@ -126,33 +121,58 @@ def render_overview(df, year):
                       metrics['least_weather'],
                       width = 'content')
 
+@st.cache_data
+def comparison_aggregates(years):
+    """Chart-ready aggregates for a tuple of years, so Vega-Lite only draws pre-aggregated rows"""
+    df = load_weather_data()
+    df = df[df['date'].dt.year.isin(years)]
+    year = df['date'].dt.year.rename('year')
+    month = df['date'].dt.month.rename('month')
+
+    monthly = df.groupby([year, month]).agg(
+        temp_max = ('temp_max', 'mean'),
+        temp_min = ('temp_min', 'mean'),
+        precipitation = ('precipitation', 'sum'),
+    ).reset_index()
+
+    # Mean of each day and the 14 after it, within a year, sampled weekly (about 52 points
+    # per year, which the 15-day window already smooths); plotted on a shared leap-year axis
+    wind = df[['date', 'wind']].assign(year = year).sort_values('date')
+    wind['avg_wind'] = (
+        wind.iloc[::-1].groupby('year')['wind']
+        .transform(lambda s: s.rolling(15, min_periods = 1).mean())
+    )
+    wind = wind[wind.groupby('year').cumcount() % 7 == 0]
+    wind['day'] = pd.to_datetime({'year': 2000, 'month': wind['date'].dt.month, 'day': wind['date'].dt.day})
+    wind = wind[['year', 'day', 'avg_wind']]
+
+    weather = df.groupby([month, 'weather']).size().rename('days').reset_index()
+    return monthly, wind, weather
+
 def render_yearly_comparison(df):
     years = sorted(df['date'].dt.year.unique())
     selected_year = st.pills('Years to compare', years, default = years, selection_mode = 'multi')
     if not selected_year:
         st.warning('You must select at least 1 year', icon = ':material/warning:')
+        return
 
-    df = df[df['date'].dt.year.isin(selected_year)]
+    monthly, wind, weather = comparison_aggregates(tuple(sorted(selected_year)))
 
     cols = st.columns(1)
 
     with cols[0].container(border = True, height = 'stretch'):
         '#### Temperature'
         st.altair_chart(
-            alt.Chart(df).mark_bar(width = 1).encode(
-                # alt.X('date', timeUnit = 'monthdate').title('Date'),
-                alt.X('month(date):O', title='Month'),
-                # alt.Y('temp_max').title('Temperature Range (C)'),
-                alt.Y('mean(temp_max):Q', title='Avg Max Temp (C)'),
-                # alt.Y2('temp_min'),
-                alt.Y2('mean(temp_min):Q'),
-                # alt.Color('date:N', timeUnit = 'year').title('year'),
-                alt.Color('year(date):N', title='Year'),
-                alt.XOffset('year(date):N'),
+            alt.Chart(monthly).mark_bar(width = 1).encode(
+                alt.X('month:O', title='Month'),
+                alt.Y('temp_max:Q', title='Avg Max Temp (C)'),
+                alt.Y2('temp_min:Q'),
+                alt.Color('year:N', title='Year'),
+                alt.XOffset('year:N'),
                 tooltip=[
-                    alt.Tooltip('year(date):N', title='Year'),
-                    alt.Tooltip('mean(temp_max):Q', title='Avg Max Temp', format='.1f'),
-                    alt.Tooltip('mean(temp_min):Q', title='Avg Min Temp', format='.1f')
+                    alt.Tooltip('year:N', title='Year'),
+                    alt.Tooltip('temp_max:Q', title='Avg Max Temp', format='.1f'),
+                    alt.Tooltip('temp_min:Q', title='Avg Min Temp', format='.1f')
                 ]
             ).configure_legend(orient = 'bottom')
         )
@@ -160,50 +180,110 @@ def render_yearly_comparison(df):
     with cols[0].container(border = True, height = 'stretch'):
         '#### Wind'
         st.altair_chart(
-            alt.Chart(df).transform_window(
-                avg_wind = 'mean(wind)',
-                std_wind = 'stdev(wind)',
-                frame = [0,14],
-                groupby=['monthdate(date)']
-            ).mark_line(size = 1).encode(
-                alt.X('date', timeUnit = 'monthdate').title('Date'),
+            alt.Chart(wind).mark_line(size = 1).encode(
+                alt.X('day:T', timeUnit = 'monthdate').title('Date'),
                 alt.Y('avg_wind:Q').title('Avg Wind (m/s, rolling 14 days)'),
-                # alt.Color('date:N', timeUnit = 'year').title('year'),
-                alt.Color('year(date):N', title='Year'),
+                alt.Color('year:N', title='Year'),
             ).configure_legend(orient = 'bottom')
         )
 
     with cols[0].container(border = True, height = 'stretch'):
         '#### Precipitation'
         st.altair_chart(
-            alt.Chart(df).mark_bar().encode(
-                # alt.X('date:N', timeUnit = 'month').title('Date'),
-                alt.X('month(date):O'),
-                alt.Y('precipitation:Q').aggregate('sum').title('Precipitation (mm)'),
-                # alt.Color('date:N', timeUnit = 'year').title('year'),
-                alt.Color('year(date):N', title='Year'),
+            alt.Chart(monthly).mark_bar().encode(
+                alt.X('month:O'),
+                alt.Y('precipitation:Q').title('Precipitation (mm)'),
+                alt.Color('year:N', title='Year'),
             ).configure_legend(orient = 'bottom')
         )
     
     with cols[0].container(border = True, height = 'stretch'):
         '#### Monthly Weather Breakdown'
         st.altair_chart(
-            alt.Chart(df).mark_bar().encode(
-                alt.X('month(date):O', title = 'month'),
-                alt.Y('count():Q', title = 'days').stack('normalize'),
+            alt.Chart(weather).mark_bar().encode(
+                alt.X('month:O', title = 'month'),
+                alt.Y('days:Q', title = 'days').stack('normalize'),
                 alt.Color('weather:N'),
-                tooltip=['weather', 'count()']
+                tooltip=['weather', 'days']
             )
     )
 
+# Hourly 2010 temperatures (F) for the multi-city comparison
+CITY_LOADERS = {
+    'Seattle': data.seattle_temps,
+    'San Francisco': data.sf_temps,
+}
+GRANULARITIES = {
+    'Daily': 'D',
+    'Weekly': 'W',
+    'Monthly': 'MS',
+}
+
+@st.cache_data
+def load_city_temps():
+    frames = [loader().assign(city = city) for city, loader in CITY_LOADERS.items()]
+    hourly = pd.concat(frames, ignore_index = True)
+    hourly['city'] = hourly['city'].astype('category')
+    return hourly[['city', 'date', 'temp']]
+
+@st.cache_data
+def city_aggregates():
+    """Every city resampled to every granularity up front, so switching granularity is a dict lookup"""
+    grouped = load_city_temps().set_index('date').groupby('city', observed = True)['temp']
+    return {
+        label: grouped.resample(freq).agg(['mean', 'min', 'max']).reset_index()
+        for label, freq in GRANULARITIES.items()
+    }
+
+def render_city_comparison():
+    aggregates = city_aggregates()
+    col1, col2 = st.columns(2)
+    with col1:
+        granularity = st.segmented_control('Granularity', list(GRANULARITIES), default = 'Daily')
+    with col2:
+        cities = st.pills('Cities', list(CITY_LOADERS), default = list(CITY_LOADERS), selection_mode = 'multi')
+    if not granularity or not cities:
+        st.warning('Select a granularity and at least 1 city', icon = ':material/warning:')
+        return
+
+    df = aggregates[granularity]
+    df = df[df['city'].isin(cities)]
+
+    with st.container(border = True):
+        f'#### {granularity} Temperature (F)'
+        base = alt.Chart(df).encode(
+            alt.X('date:T', title = 'Date'),
+            alt.Color('city:N', title = 'City'),
+        )
+        band = base.mark_area(opacity = 0.2).encode(alt.Y('min:Q'), alt.Y2('max:Q'))
+        line = base.mark_line(size = 1).encode(
+            alt.Y('mean:Q', title = 'Temperature (F)'),
+            tooltip = [
+                alt.Tooltip('city:N', title = 'City'),
+                alt.Tooltip('date:T', title = 'Date'),
+                alt.Tooltip('mean:Q', title = 'Mean', format = '.1f'),
+                alt.Tooltip('min:Q', title = 'Min', format = '.1f'),
+                alt.Tooltip('max:Q', title = 'Max', format = '.1f'),
+            ]
+        )
+        st.altair_chart((band + line).configure_legend(orient = 'bottom'))
+
+    cols = st.columns(len(cities))
+    for col, (city, city_df) in zip(cols, df.groupby('city', observed = True)):
+        col.metric(f'{city} mean', f"{city_df['mean'].mean():0.1f}F")
+        col.caption(f"Range {city_df['min'].min():0.1f}F to {city_df['max'].max():0.1f}F")
+
 if page_options == 'Overview':
     if selected_year:
-        render_overview(full_df, selected_year)
+        render_overview(year_summary, selected_year)
 
 if page_options == 'Year Comparison':
     if selected_year:
         render_yearly_comparison(full_df)
 
+if page_options == 'City Comparison':
+    render_city_comparison()
+
 if page_options == 'Raw Data':
     years = st.multiselect(
         'Filter years',
@@ -1,10 +1,13 @@
 # Load libraries
 from datetime import datetime
+import time
 from vega_datasets import data
 import streamlit as st
-import altair as alt
 import pandas as pd
 
+from column_profile import (MAX_CATEGORIES, cached_counts, cached_histogram, cached_profile,
+                            columns_of_kind, counts_chart, fingerprint, histogram_chart)
+
 # Set Streamlit page config
 st.set_page_config(page_title = 'Vega Datasets', layout = 'wide')
 # st.title('Seattle Weather')
@@ -20,47 +23,65 @@ Let's explore tables in the [Vega Datasets](https://vega.github.io/vega-datasets
 # Load dataset
 datasets_list = data.list_datasets()
 
-datasets = {
-    "airports": data.airports(),
-    "barley": data.barley(),
-    "budget": data.budget(),
-    "cars": data.cars(),
-    "climate": data.climate(),
-    "co2_concentration": data.co2_concentration(),
-    "disasters": data.disasters(),
-    "driving": data.driving(),
-    #"earthquakes": data.earthquakes(),
-    "flights_10k": data.flights_10k(),
-    "flights_2k": data.flights_2k(),
-    "gapminder": data.gapminder(),
-    #"germany": data.germany(),
-    "income": data.income(),
-    "iowa_electricity": data.iowa_electricity(),
-    "iris": data.iris(),
-    "jobs": data.jobs(),
-    "lookup_groups": data.lookup_groups(),
-    "lookup_people": data.lookup_people(),
-    "miserables": data.miserables(),
-    "monarchs": data.monarchs(),
-    "movies": data.movies(),
-    "normal_2d": data.normal_2d(),
-    "population": data.population(),
-    "seattle_temps": data.seattle_temps(),
-    "seattle_weather": data.seattle_weather(),
-    "sf_temps": data.sf_temps(),
-    "sp500": data.sp500(),
-    "stocks": data.stocks(),
-    #"us_10m": data.us_10m(),  # TopoJSON data
-    "us_employment": data.us_employment(),
-    "us_state_capitals": data.us_state_capitals(),
-    #"us_states": data.us_states(), no dataset named 'us_states'
-    "weather": data.weather(),
-    "wheat": data.wheat(),
-    #"world_110m": data.world_110m()  # TopoJSON data
-}
+# Datasets are loaded by name on first selection, not all up front
+DATASET_NAMES = [
+    "airports",
+    "barley",
+    "budget",
+    "cars",
+    "climate",
+    "co2_concentration",
+    "disasters",
+    "driving",
+    #"earthquakes",
+    "flights_10k",
+    "flights_2k",
+    "gapminder",
+    #"germany",
+    "income",
+    "iowa_electricity",
+    "iris",
+    "jobs",
+    "lookup_groups",
+    "lookup_people",
+    "miserables",
+    "monarchs",
+    "movies",
+    "normal_2d",
+    "population",
+    "seattle_temps",
+    "seattle_weather",
+    "sf_temps",
+    "sp500",
+    "stocks",
+    #"us_10m",  # TopoJSON data
+    "us_employment",
+    "us_state_capitals",
+    #"us_states", no dataset named 'us_states'
+    "weather",
+    "wheat",
+    #"world_110m",  # TopoJSON data
+]
+DATASET_CACHE_SIZE = 8 # most recently used datasets kept in memory
+
+@st.cache_resource
+def load_log():
+    """Load time and memory of each dataset loaded since the server started"""
+    return {}
+
+@st.cache_data(max_entries = DATASET_CACHE_SIZE, show_spinner = 'Loading dataset...')
+def load_dataset(name):
+    start = time.perf_counter()
+    df = pd.DataFrame(getattr(data, name)())
+    load_log()[name] = {
+        'Load time (s)': round(time.perf_counter() - start, 3),
+        'Memory (MB)': round(df.memory_usage(deep = True).sum() / 2**20, 2),
+        'Rows': len(df),
+    }
+    return df
 
 # Print Vega datasets in a selectbox
-selected_dataset = st.selectbox('Select a dataset you would like to explore', list(datasets.keys()))
+selected_dataset = st.selectbox('Select a dataset you would like to explore', DATASET_NAMES)
 
 ''
 '' 
@@ -68,10 +89,20 @@ selected_dataset = st.selectbox('Select a dataset you would like to explore', li
 '''
 ## Raw Data
 '''
-df = pd.DataFrame(datasets[selected_dataset]) 
+df = load_dataset(selected_dataset)
 # df2 = st.dataframe(datasets[selected_dataset])
 st.dataframe(df)
-# st.caption(f'Returned rows: {len(df)}')
+stats = load_log().get(selected_dataset)
+if stats:
+    st.caption(f"Loaded in {stats['Load time (s)']}s, {stats['Memory (MB)']} MB in memory")
+with st.expander('Dataset load log'):
+    st.dataframe(pd.DataFrame.from_dict(load_log(), orient = 'index'))
+    st.caption(f'Up to {DATASET_CACHE_SIZE} recently used datasets stay cached')
+
+digest = fingerprint(df)
+profile, top_values = cached_profile(digest, df)
+num_cols = columns_of_kind(profile, 'numeric')
+cat_cols = columns_of_kind(profile, 'categorical')
 
 '''
 ## Summary Statistics
@@ -94,48 +125,40 @@ with st.container(horizontal = True, gap = 'medium'):
     with cols[0]:
         st.metric(
             'Numerical Column Count',
-            len(df.select_dtypes(include=["number"]).columns),
+            len(num_cols),
             width = 'content'
         )
     with cols[1]:
         st.metric(
             'Categorical Column Count',
-            len(df.select_dtypes(include=["object"]).columns),
+            len(cat_cols),
             width = 'content'
         )
     with cols[2]:
         st.metric(
             'Datetime Column Count',
-            len(df.select_dtypes(include=['datetime']).columns),
+            len(columns_of_kind(profile, 'datetime')),
             width = 'content'
         )
 
 '''
 ## Descriptive Statistics
 '''
-st.dataframe(df.describe().transpose())
+st.dataframe(profile)
 
 # Categorical column sumamries
-cat_cols = df.select_dtypes(include = ['object']).columns
 if len(cat_cols) > 0:
     st.write('## Categorical Features Summary')
     for col in cat_cols:
         st.write(f'**{col}**')
-        st.write(df[col].value_counts().head(10))
+        st.write(top_values[col])
 
 '''
 ## Visual Insights
 '''
-num_cols = df.select_dtypes(include = ['number', 'float']).columns
 if len(num_cols) > 0:
     selected_num_col = st.selectbox('Select a numeric column to visualize', num_cols)
-    num_hist_chart = (
-        alt.Chart(df).mark_bar().encode(
-            alt.X(selected_num_col, bin = alt.Bin(maxbins = 30)),
-            y = 'count()',
-            tooltip = [selected_num_col, 'count()']
-        ).properties(height = 300)
-    )
+    num_hist_chart = histogram_chart(cached_histogram(digest, selected_num_col, df), selected_num_col)
     st.altair_chart(num_hist_chart, use_container_width=True)
 else:
     st.info('No numeric columns available for this histogram')
@@ -143,13 +166,9 @@ else:
 # cat_cols = df.select_dtypes(include = ['object']).columns
 if len(cat_cols) > 0:
     selected_cat_col = st.selectbox('Select a categorical column to visualize', cat_cols)
-    cat_hist_chart = (
-        alt.Chart(df).mark_bar().encode(
-            alt.X(selected_cat_col, sort = '-y'), #bin = alt.Bin(maxbins = 30)),
-            y = 'count()',
-            tooltip = [selected_cat_col, 'count()']
-        ).properties(height = 300)
-    )
+    cat_hist_chart = counts_chart(cached_counts(digest, selected_cat_col, df), selected_cat_col)
     st.altair_chart(cat_hist_chart, use_container_width = True)
+    if profile.loc[selected_cat_col, 'unique'] > MAX_CATEGORIES:
+        st.caption(f"Showing the {MAX_CATEGORIES} most frequent of {profile.loc[selected_cat_col, 'unique']:,} values")
 else:
     st.info('No categorical columns available for this histogram')
\ No newline at end of file
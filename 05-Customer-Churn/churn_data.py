@@ -0,0 +1,102 @@
+"""Typed, cached loading of the customer churn training file shared by the churn pages.
+
+The CSV is parsed once with explicit dtypes (categoricals for the text columns,
+downcast integers/floats) and written to a Parquet sidecar named after the
+file's content hash. The hash itself is only recomputed when the file's
+mtime or size changes, so later runs read the Parquet file directly.
+"""
+import hashlib
+import os
+import time
+from pathlib import Path
+
+import pandas as pd
+import streamlit as st
+
+DATA_PATH = Path(os.environ.get(
+    'CHURN_DATA_PATH',
+    '/Users/kiroshenouda/Desktop/COMPSCI/DATASETS/Customer Churn/customer_churn_dataset-training-master.csv'
+))
+CACHE_DIR = Path(__file__).parent / '.churn_cache'
+
+CATEGORIES = {
+    'Gender': ['Female', 'Male'],
+    'Subscription Type': ['Basic', 'Standard', 'Premium'],
+    'Contract Length': ['Monthly', 'Quarterly', 'Annual'],
+}
+INTEGER_COLUMNS = ['CustomerID', 'Age', 'Tenure', 'Usage Frequency', 'Support Calls',
+                   'Payment Delay', 'Last Interaction', 'Churn']
+FLOAT_COLUMNS = ['Total Spend']
+# Read numerics as float so the file's blank rows parse, then downcast once they're dropped;
+# text columns are read as strings so values outside CATEGORIES can be counted before casting
+CSV_DTYPES = {
+    **{col: 'float64' for col in INTEGER_COLUMNS + FLOAT_COLUMNS},
+    **{col: 'string' for col in CATEGORIES},
+}
+
+
+def parse_churn_csv(source):
+    """Read a churn CSV (path or file-like) into compact dtypes; columns it lacks are skipped
+
+    Raises ValueError on unparseable numbers. Category values outside CATEGORIES become
+    NaN; df.attrs['unrecognised'] maps each such column to how many values were dropped.
+    """
+    df = pd.read_csv(source, dtype=CSV_DTYPES).dropna(how='all').reset_index(drop=True)
+    unrecognised = {}
+    for col in df.columns.intersection(list(CATEGORIES)):
+        raw = df[col]
+        df[col] = raw.astype(pd.CategoricalDtype(CATEGORIES[col]))
+        count = int((raw.notna() & df[col].isna()).sum())
+        if count:
+            unrecognised[col] = count
+    for col in df.columns.intersection(INTEGER_COLUMNS):
+        df[col] = pd.to_numeric(df[col], downcast='integer')
+    for col in df.columns.intersection(FLOAT_COLUMNS):
+        df[col] = pd.to_numeric(df[col], downcast='float')
+    df.attrs['unrecognised'] = unrecognised
+    return df
+
+
+@st.cache_data(show_spinner=False)
+def file_digest(path, mtime_ns, size):
+    """Content hash of a file; mtime_ns and size only key the cache"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()[:16]
+
+
+@st.cache_data(show_spinner='Loading churn data...')
+def load_parquet_or_csv(path, digest):
+    start = time.perf_counter()
+    sidecar = CACHE_DIR / f'{Path(path).stem}-{digest}.parquet'
+    if sidecar.exists():
+        df = pd.read_parquet(sidecar)
+        source = 'parquet'
+    else:
+        df = parse_churn_csv(path)
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp = sidecar.with_suffix(f'.{os.getpid()}.tmp')
+        df.to_parquet(tmp, index=False)
+        os.replace(tmp, sidecar)
+        source = 'csv'
+    info = {
+        'digest': digest,
+        'source': source,
+        'load_seconds': time.perf_counter() - start,
+        'memory_mb': df.memory_usage(deep=True).sum() / 2**20,
+    }
+    return df, info
+
+
+def load_churn_data(path=DATA_PATH):
+    """Return (df, info); info has the file digest, where it was read from, load time and memory"""
+    stat = os.stat(path)
+    digest = file_digest(str(path), stat.st_mtime_ns, stat.st_size)
+    return load_parquet_or_csv(str(path), digest)
+
+
+def load_summary(info):
+    return (f"Loaded from {info['source']} in {info['load_seconds']:.2f}s, "
+            f"{info['memory_mb']:.1f} MB in memory")
@@ -1,8 +1,18 @@
 # Load libraries
 import streamlit as st
 from datetime import datetime
-import altair as alt
-import pandas as pd
+import sys
+from pathlib import Path
+
+# Shared helpers live in the app folder and at the repository root; reruns
+# re-execute this script, so each path is only added once
+APP_DIR = Path(__file__).resolve().parents[1]
+for path in (str(APP_DIR), str(APP_DIR.parent)):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+from churn_data import load_churn_data, load_summary
+from column_profile import (MAX_CATEGORIES, cached_counts, cached_histogram, cached_profile,
+                            columns_of_kind, counts_chart, histogram_chart)
 
 # Set page config
 st.set_page_config(page_title = 'Customer Churn Exploration', layout = 'wide')
@@ -17,8 +27,9 @@ This page shows a quick description and exploration of the data so we know what
 '''
 ### Raw Data
 '''
-df = pd.read_csv('/Users/kiroshenouda/Desktop/COMPSCI/DATASETS/Customer Churn/customer_churn_dataset-training-master.csv')
+df, load_info = load_churn_data()
 st.dataframe(df)
+st.caption(load_summary(load_info))
 
 ''
 '''
@@ -31,8 +42,10 @@ st.dataframe(list(df.columns))
 ### Row Count and Column Distribution
 '''
 # Display metrics for numerical, categorical columns here
-cat_cols = df.select_dtypes(include = 'object').columns
-num_cols = df.select_dtypes(include = 'number').columns
+digest = load_info['digest']
+profile, top_values = cached_profile(digest, df)
+cat_cols = columns_of_kind(profile, 'categorical')
+num_cols = columns_of_kind(profile, 'numeric')
 
 with st.container(horizontal = True, gap = 'medium'):
     cols = st.columns(3, gap = 'medium', width = 900)
@@ -59,11 +72,11 @@ with st.container(horizontal = True, gap = 'medium'):
 '''
 ### Data Info and Description
 '''
-st.dataframe(df.describe())
+st.dataframe(profile)
 if(len(cat_cols) > 0):
     for col in cat_cols:
         st.write(f'**{col}**')
-        st.write(df[col].value_counts())
+        st.write(top_values[col])
 
 ''
 '''
@@ -71,13 +84,7 @@ if(len(cat_cols) > 0):
 '''
 if(len(num_cols) > 0):
     selected_num_col = st.selectbox('Select a numeric column to visualize', num_cols)
-    num_hist_chart = (
-        alt.Chart(df).mark_bar().encode(
-            alt.X(selected_num_col, bin = alt.Bin(maxbins = 30)),
-            y = 'count()',
-            tooltip = [selected_num_col, 'count()']
-        ).properties(height = 300)
-    )
+    num_hist_chart = histogram_chart(cached_histogram(digest, selected_num_col, df), selected_num_col)
     st.altair_chart(num_hist_chart, use_container_width=True)
 else:
     st.write('This dataset does not have any numerical columns')
@@ -88,13 +95,9 @@ else:
 '''
 if(len(cat_cols) > 0):
     selected_cat_col = st.selectbox('Select a categorical column to visualize', cat_cols)
-    cat_hist_chart = (
-        alt.Chart(df).mark_bar().encode(
-            alt.X(selected_cat_col, sort = '-y'), #bin = alt.Bin(maxbins = 30)),
-            y = 'count()',
-            tooltip = [selected_cat_col, 'count()']
-        ).properties(height = 300)
-    )
+    cat_hist_chart = counts_chart(cached_counts(digest, selected_cat_col, df), selected_cat_col)
     st.altair_chart(cat_hist_chart, use_container_width = True)
+    if profile.loc[selected_cat_col, 'unique'] > MAX_CATEGORIES:
+        st.caption(f"Showing the {MAX_CATEGORIES} most frequent of {profile.loc[selected_cat_col, 'unique']:,} values")
 else:
     st.write('This dataset does not have any categorical columns')
\ No newline at end of file
@@ -1,13 +1,28 @@
 # Load libraries
 import streamlit as st
 import pandas as pd
-import altair as alt
+import joblib
+import os
+import time
 from datetime import datetime
-from sklearn.model_selection import cross_val_predict
-from sklearn.metrics import confusion_matrix, classification_report, f1_score, precision_score, recall_score, roc_auc_score, roc_curve
+from sklearn.compose import ColumnTransformer
+from sklearn.impute import SimpleImputer
+from sklearn.metrics import confusion_matrix, f1_score, precision_score, recall_score, roc_auc_score
 from sklearn.linear_model import LogisticRegression
 from sklearn.model_selection import train_test_split
-from sklearn import preprocessing
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+import sys
+from pathlib import Path
+
+# Shared helpers live in the app folder and at the repository root; reruns
+# re-execute this script, so each path is only added once
+APP_DIR = Path(__file__).resolve().parents[1]
+for path in (str(APP_DIR), str(APP_DIR.parent)):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+from churn_data import CATEGORIES, load_churn_data, parse_churn_csv
+from column_profile import histogram_chart, numeric_histogram
 
 # Set page config
 st.set_page_config(page_title = 'Customer Churn Prediction Model', layout = 'wide')
@@ -15,16 +30,158 @@ st.set_page_config(page_title = 'Customer Churn Prediction Model', layout = 'wid
 # Title and description
 '''
 # Customer Churn Prediction Model
-This page will present a linear regression model used to predict Churn given the variables in this table.
-This page will also allow users to choose the values for each variable to see if a customer would churn or not.
+This page will present a logistic regression model used to predict Churn given the variables in this table.
+This page will also allow users to choose the values for each variable to see if a customer would churn or not,
+or upload a CSV of customers to score them all at once.
+'''
+
+NUMERIC_FEATURES = ['Age', 'Tenure', 'Usage Frequency', 'Support Calls',
+                    'Payment Delay', 'Total Spend', 'Last Interaction']
+CATEGORICAL_FEATURES = list(CATEGORIES)
+FEATURES = NUMERIC_FEATURES + CATEGORICAL_FEATURES
+MODEL_PATH = APP_DIR / 'models'
+
+def build_pipeline():
+    preprocessor = ColumnTransformer(transformers = [
+        ('num', Pipeline([
+            ('impute', SimpleImputer(strategy = 'median')),
+            ('scaler', StandardScaler())
+        ]), NUMERIC_FEATURES),
+        ('cat', OneHotEncoder(handle_unknown = 'ignore'), CATEGORICAL_FEATURES)
+    ])
+    return Pipeline([
+        ('preprocess', preprocessor),
+        ('model', LogisticRegression(max_iter = 1000))
+    ])
+
+@st.cache_resource(show_spinner = 'Loading churn model...')
+def load_or_train_model(digest, _df):
+    """Pipeline and its test metrics, trained once per dataset digest and persisted with joblib"""
+    path = MODEL_PATH / f'churn_pipeline-{digest}.joblib'
+    if path.exists():
+        return joblib.load(path)
+
+    X_train, X_test, y_train, y_test = train_test_split(
+        _df[FEATURES], _df['Churn'], test_size = 0.20, random_state = 12345, stratify = _df['Churn']
+    )
+    pipeline = build_pipeline()
+    start = time.perf_counter()
+    pipeline.fit(X_train, y_train)
+    train_seconds = time.perf_counter() - start
+
+    y_prob = pipeline.predict_proba(X_test)[:, 1]
+    y_pred = (y_prob >= 0.5).astype(int)
+    bundle = {
+        'pipeline': pipeline,
+        'digest': digest,
+        'trained_at': datetime.now().isoformat(timespec = 'seconds'),
+        'train_seconds': train_seconds,
+        'metrics': {
+            'Precision': precision_score(y_test, y_pred),
+            'Recall': recall_score(y_test, y_pred),
+            'F1': f1_score(y_test, y_pred),
+            'ROC AUC': roc_auc_score(y_test, y_prob),
+        },
+        'confusion_matrix': confusion_matrix(y_test, y_pred),
+    }
+    MODEL_PATH.mkdir(exist_ok = True)
+    tmp = path.with_suffix(f'.{os.getpid()}.tmp')
+    joblib.dump(bundle, tmp)
+    os.replace(tmp, path)
+    return bundle
+
+df, load_info = load_churn_data()
+bundle = load_or_train_model(load_info['digest'], df)
+model = bundle['pipeline']
+
+''
 '''
+### Model Performance
+'''
+cols = st.columns(len(bundle['metrics']))
+for col, (name, value) in zip(cols, bundle['metrics'].items()):
+    col.metric(name, f'{value:.3f}')
+
+conf_mat = pd.DataFrame(
+    bundle['confusion_matrix'],
+    index = ['Actual: Stayed', 'Actual: Churned'],
+    columns = ['Predicted: Stayed', 'Predicted: Churned']
+)
+st.dataframe(conf_mat)
+st.caption(f"Trained {bundle['trained_at']} in {bundle['train_seconds']:.1f}s on dataset {bundle['digest']}; "
+           'reloaded from disk on later runs')
+
+''
+tab1, tab2 = st.tabs(['Single Customer', 'Batch Scoring'])
+
+with tab1:
+    with st.form('single_customer'):
+        cols = st.columns(3)
+        inputs = {}
+        for i, feature in enumerate(NUMERIC_FEATURES):
+            inputs[feature] = cols[i % 3].number_input(
+                feature,
+                min_value = float(df[feature].min()),
+                max_value = float(df[feature].max()),
+                value = float(df[feature].median())
+            )
+        for i, feature in enumerate(CATEGORICAL_FEATURES):
+            inputs[feature] = cols[i % 3].selectbox(feature, CATEGORIES[feature])
+        submitted = st.form_submit_button('Predict')
+    if submitted:
+        probability = model.predict_proba(pd.DataFrame([inputs]))[0, 1]
+        st.metric('Churn probability', f'{probability:.1%}')
+        if probability >= 0.5:
+            st.error('This customer is likely to churn')
+        else:
+            st.success('This customer is likely to stay')
+
+with tab2:
+    uploaded_file = st.file_uploader('Upload a CSV of customers to score', type = 'csv')
+    st.caption(f"Required columns: {', '.join(FEATURES)}")
+    if uploaded_file is not None:
+        try:
+            customers = parse_churn_csv(uploaded_file)
+        except ValueError as e:
+            st.error(f'Could not read the file: {e}')
+            st.stop()
+        missing = [feature for feature in FEATURES if feature not in customers.columns]
+        unrecognised = customers.attrs['unrecognised']
+        if unrecognised:
+            details = ', '.join(
+                f"{count:,} in {col} (expected {', '.join(CATEGORIES[col])})"
+                for col, count in unrecognised.items()
+            )
+            st.warning(f'Unrecognised values were scored as missing: {details}')
+        if missing:
+            st.error(f"The file is missing these columns: {', '.join(missing)}")
+        elif customers.empty:
+            st.warning('The file has no customer rows to score.')
+        else:
+            # One vectorized predict_proba call for the whole file
+            start = time.perf_counter()
+            probabilities = model.predict_proba(customers[FEATURES])[:, 1]
+            score_seconds = time.perf_counter() - start
 
-df = pd.read_csv('/Users/kiroshenouda/Desktop/COMPSCI/DATASETS/Customer Churn/customer_churn_dataset-training-master.csv')
-X = df.drop('Churn', axis = 1)
-y = df['Churn']
+            id_cols = [col for col in ['CustomerID'] if col in customers.columns]
+            scores = customers[id_cols].assign(**{
+                'Churn Probability': probabilities.round(4),
+                'Predicted Churn': (probabilities >= 0.5).astype(int)
+            })
+            col1, col2, col3 = st.columns(3)
+            col1.metric('Customers scored', f'{len(scores):,}')
+            col2.metric('Predicted to churn', f"{scores['Predicted Churn'].mean():.1%}")
+            col3.metric('Scoring time', f'{score_seconds * 1000:.0f} ms')
 
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size = 0.20, random_state = 12345)
-log_reg_model = LogisticRegression(X_train, y_train)
-y_pred = log_reg_model.predict(X_test)
-conf_mat = confusion_matrix(y_pred, y_test)
-st.write(conf_mat)
\ No newline at end of file
+            st.altair_chart(
+                histogram_chart(numeric_histogram(scores['Churn Probability'], bins = 20),
+                                'Churn Probability', y_title = 'Customers', height = 250),
+                use_container_width = True
+            )
+            st.dataframe(scores, use_container_width = True)
+            st.download_button(
+                label = 'Download Scores as CSV',
+                data = scores.to_csv(index = False),
+                file_name = 'churn_scores.csv',
+                mime = 'text/csv',
+            )
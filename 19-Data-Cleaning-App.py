@@ -3,6 +3,8 @@ import pandas as pd
 import streamlit as st
 import plotly.express as px
 
+from column_profile import cached_profile, columns_of_kind, fingerprint
+
 st.set_page_config(page_title='Data Analysis/Cleaning Application', layout='wide')
 st.title('Data Analysis/Cleaning App')
 #st.markdown('''
@@ -73,8 +75,10 @@ if uploaded_file is not None:
     subheader = st.subheader(f'File Name: {uploaded_file.name}')
     df = st.session_state.df
     # df = pd.DataFrame(pd.read_csv(uploaded_file))
-    cat_cols = df.select_dtypes(include=['category','object'])
-    num_cols = df.select_dtypes(include=['int', 'float'])
+    # Column conversions change the fingerprint, so the profile is recomputed after one
+    profile, top_values = cached_profile(fingerprint(df), df, top_k = 20)
+    cat_cols = columns_of_kind(profile, 'categorical')
+    num_cols = columns_of_kind(profile, 'numeric')
     
     if pages == page_options[0]:
         st.write(df)
@@ -83,8 +87,8 @@ if uploaded_file is not None:
 
     if pages == page_options[1]:
         st.subheader('Missing Values Summary')
-        missing_values = df.isna().sum()
-        missing_values_pct = (100 * missing_values / len(df)).round(2)
+        missing_values = profile['nulls']
+        missing_values_pct = profile['null_pct']
         if np.count_nonzero(missing_values.values) == 0:
             # st.success(f'{uploaded_file.name} contains no missing values')
             st.success('File contains no missing values')
@@ -100,13 +104,10 @@ if uploaded_file is not None:
         st.subheader('Column Breakdown')
         col1, col2, col3 = st.columns(3)
         col1.metric('Total columns', df.shape[1])
-        col2.metric('Categorical columns', cat_cols.shape[1])
-        col3.metric('Numerical columns', num_cols.shape[1])
+        col2.metric('Categorical columns', len(cat_cols))
+        col3.metric('Numerical columns', len(num_cols))
         st.divider()
-        st.dataframe(pd.DataFrame({
-            'Column Name': df.columns,
-            'Data Type': df.dtypes.astype(str)
-        }))
+        st.dataframe(profile)
 
     if pages == page_options[3]:
         st.subheader('Column Redefinition (Optional)')
@@ -145,15 +146,15 @@ if uploaded_file is not None:
     if pages == page_options[4]:
         col1, col2 = st.columns([1, 1])
         num_col_selection = col1.selectbox('Select a numerical column to visualize',
-                                            options=num_cols.columns, index=None)
+                                            options=num_cols, index=None)
         cat_col_selection = col2.selectbox('Select a categorical column to visualize',
-                                            options=cat_cols.columns, index=None)
+                                            options=cat_cols, index=None)
         if num_col_selection:
             fig = px.histogram(df, x=num_col_selection, nbins=20,
                                title=f'Distribution of {num_col_selection}')
             col1.plotly_chart(fig, use_container_width=True)
         if cat_col_selection:
-            fig = px.bar(df[cat_col_selection].value_counts().head(20),
+            fig = px.bar(top_values[cat_col_selection],
                          title=f'Distribution of {cat_col_selection}')
             fig.update_layout(showlegend=False)
             col2.plotly_chart(fig, use_container_width=True)
@@ -2,6 +2,8 @@ import streamlit as st
 import pandas as pd
 import requests
 
+from lttb import downsample
+
 st.set_page_config(page_title='Bitcoin Tracker', layout='wide')
 st.title('Bitcoin Price Tracker - CoinGecko')
 
@@ -30,6 +32,12 @@ try:
 
     df = pd.DataFrame(prices, columns=['Timestamp', 'Price'])
     df['Date'] = pd.to_datetime(df['Timestamp'], unit='ms')
-    st.line_chart(df.set_index('Date')['Price'])
+    st.line_chart(downsample(df, 'Date', 'Price').set_index('Date')['Price'])
+    st.download_button(
+        label='Download Price History as CSV',
+        data=df[['Date', 'Price']].to_csv(index=False),
+        file_name='bitcoin_price_history.csv',
+        mime='text/csv',
+    )
 except requests.exceptions.RequestException as e:
     st.error(f'Failed to fetch historical data price {e}')
\ No newline at end of file
@@ -3,6 +3,8 @@ import pandas as pd
 import plotly.express as px
 from sklearn.linear_model import LinearRegression
 
+from lttb import downsample
+
 st.set_page_config(page_title='Gas Price Analysis', layout='wide')
 st.title('Gas Price Analysis')
 st.markdown('''
@@ -86,7 +88,9 @@ if selected_page == 'Visualizations':
     tab1, tab2 = st.tabs(['Line Chart', 'Correlation Matrix'])
     with tab1:
         metric = st.selectbox('Metric', ['Open', 'Close', 'High', 'Low', 'Volume', 'Rolling Mean'])
-        fig = px.line(filtered_df, x='Date', y=metric, color='Symbol', title=f'{metric} Over Time')
+        # Each symbol's line is downsampled on its own; the export below has every row
+        chart_df = downsample(filtered_df, 'Date', metric, by='Symbol')
+        fig = px.line(chart_df, x='Date', y=metric, color='Symbol', title=f'{metric} Over Time')
         vline_date = '2020-03-16'
         fig.add_vline(
             x=vline_date,
@@ -105,6 +109,12 @@ if selected_page == 'Visualizations':
         but much cheaper than the other two resources.
         ''')
         st.info(f'{most_volatile} appears to be the most volatile commodity')
+        st.download_button(
+            label='Download Filtered Data as CSV',
+            data=filtered_df.to_csv(index=False),
+            file_name='oil_and_gas_filtered.csv',
+            mime='text/csv',
+        )
     with tab2:
         pivot_df = filtered_df.pivot(index='Date', columns='Symbol', values='Close')
         corr = pivot_df.corr()
@@ -146,7 +156,7 @@ if selected_page == 'Forecasting':
     })
     future_df['Date_Ordinal'] = future_df['Date'].map(pd.Timestamp.toordinal)
     future_df['Predicted Close'] = model.predict(future_df[['Date_Ordinal']])
-    fig = px.line(symbol_df, x='Date', y='Close', title=f'{forecast_symbol} Forecast')
+    fig = px.line(downsample(symbol_df, 'Date', 'Close'), x='Date', y='Close', title=f'{forecast_symbol} Forecast')
     fig.add_scatter(
         x=future_df['Date'],
         y=future_df['Predicted Close'],
@@ -0,0 +1,176 @@
+"""Benchmark the RAG path of 02-AI-Powered-Document-Q&A-App.py
+
+Runs extract_text, chunk_text, embed_chunks, build_index, retrieve_chunks and the
+QA call on synthetic PDFs of increasing size (plus any sample PDFs given) and prints
+JSON so runs can be diffed or compared over time. Each document is benchmarked in a
+fresh process, so its peak RSS isn't inflated by the documents before it.
+
+Usage:
+    python benchmarks/doc_qa_bench.py --pages 10 50 200 --pdf manual.pdf --output run.json
+"""
+import argparse
+import io
+import json
+import multiprocessing
+import platform
+import resource
+import runpy
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import PyPDF2
+
+ROOT = Path(__file__).resolve().parent.parent
+APP_PATH = ROOT / '02-AI-Powered-Document-Q&A-App.py'
+
+VOCABULARY = (
+    'contract clause payment supplier warranty delivery invoice section party term '
+    'agreement notice liability schedule service price order period renewal audit '
+    'report revenue quarter customer product safety maintenance inspection valve '
+    'pressure pump motor sensor calibration torque module firmware voltage'
+).split()
+
+QUESTIONS = [
+    'What is the warranty period?',
+    'Who is responsible for maintenance?',
+    'When is payment due after the invoice?',
+    'What pressure should the valve be calibrated to?',
+    'How long is the renewal notice period?',
+    'Which party carries liability for delivery delays?',
+    'What torque is specified for the pump motor?',
+    'How often is an audit performed?',
+]
+
+
+def make_pdf(n_pages, lines_per_page=40, words_per_line=12, seed=0):
+    """Build a text PDF with n_pages pages of random vocabulary, using only the stdlib"""
+    rng = np.random.default_rng(seed)
+    objects = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        None,  # page tree, filled in once page object numbers are known
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>',
+    ]
+    page_ids = []
+    for page in range(n_pages):
+        lines = [f'Section {page + 1}.{line + 1} ' + ' '.join(rng.choice(VOCABULARY, words_per_line))
+                 for line in range(lines_per_page)]
+        text = ' T* '.join(f'({line}) Tj' for line in lines)
+        stream = f'BT /F1 9 Tf 11 TL 40 760 Td {text} ET'.encode('latin-1')
+        objects.append(b'<< /Length %d >>\nstream\n%s\nendstream' % (len(stream), stream))
+        objects.append(
+            b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] '
+            b'/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>' % (len(objects))
+        )
+        page_ids.append(len(objects))
+    kids = ' '.join(f'{i} 0 R' for i in page_ids).encode()
+    objects[1] = b'<< /Type /Pages /Kids [%s] /Count %d >>' % (kids, n_pages)
+
+    out = bytearray(b'%PDF-1.4\n')
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b'%d 0 obj\n%s\nendobj\n' % (number, body)
+    xref = len(out)
+    out += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    out += b''.join(b'%010d 00000 n \n' % offset for offset in offsets)
+    out += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+def peak_rss_mb(who=resource.RUSAGE_SELF):
+    """High-water resident set size; for RUSAGE_CHILDREN, that of the largest single reaped child"""
+    scale = 1024 * 1024 if platform.system() == 'Darwin' else 1024  # bytes on macOS, KB on Linux
+    return resource.getrusage(who).ru_maxrss / scale
+
+
+def load_app():
+    """Execute the Streamlit script in bare mode and return its namespace of helpers"""
+    sys.path.insert(0, str(ROOT))
+    return runpy.run_path(str(APP_PATH), run_name='doc_qa_app')
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def bench_document(app, name, data, n_queries):
+    n_pages = len(PyPDF2.PdfReader(io.BytesIO(data)).pages)
+    text, extract_s = timed(app['extract_text'], data)
+    chunks, chunk_s = timed(app['chunk_text'], text)
+    (_, embeddings), embed_s = timed(app['embed_chunks'], chunks)
+    index, index_s = timed(app['build_index'], embeddings)
+
+    retrieve_ms, qa_ms = [], []
+    for question in (QUESTIONS * n_queries)[:n_queries]:
+        hits, seconds = timed(app['retrieve_chunks'], question, chunks, index)
+        retrieve_ms.append(seconds * 1000)
+        _, seconds = timed(app['answer_ranked'], question, hits)
+        qa_ms.append(seconds * 1000)
+    query_ms = np.add(retrieve_ms, qa_ms)
+
+    return {
+        'document': name,
+        'pages': n_pages,
+        'chunks': len(chunks),
+        'pages_per_sec': n_pages / extract_s,
+        'chunks_per_sec': len(chunks) / chunk_s,
+        'embedding_ms_per_chunk': embed_s * 1000 / len(chunks),
+        'index_build_ms': index_s * 1000,
+        'retrieve_p50_ms': float(np.percentile(retrieve_ms, 50)),
+        'retrieve_p95_ms': float(np.percentile(retrieve_ms, 95)),
+        'query_p50_ms': float(np.percentile(query_ms, 50)),
+        'query_p95_ms': float(np.percentile(query_ms, 95)),
+    }
+
+
+def bench_isolated(name, data, n_queries):
+    """Load the app and benchmark one document; run in a fresh process per document"""
+    app = load_app()
+    loaded_rss = peak_rss_mb()
+    result = bench_document(app, name, data, n_queries)
+    result.update({
+        'peak_rss_mb': peak_rss_mb(),
+        # Growth of the high-water mark over the app with its models loaded
+        'document_rss_mb': peak_rss_mb() - loaded_rss,
+        'extract_worker_peak_rss_mb': peak_rss_mb(resource.RUSAGE_CHILDREN),
+    })
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pages', type=int, nargs='*', default=[10, 50, 200],
+                        help='sizes of the synthetic PDFs to generate')
+    parser.add_argument('--pdf', type=Path, nargs='*', default=[], help='sample PDFs to include')
+    parser.add_argument('--queries', type=int, default=20, help='questions per document')
+    parser.add_argument('--output', type=Path, help='write JSON here instead of stdout')
+    args = parser.parse_args()
+
+    documents = [(f'synthetic-{n}p', make_pdf(n, seed=n)) for n in args.pages]
+    documents += [(path.name, path.read_bytes()) for path in args.pdf]
+
+    results = []
+    for name, data in documents:
+        print(f'benchmarking {name}...', file=sys.stderr)
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as pool:
+            results.append(pool.submit(bench_isolated, name, data, args.queries).result())
+
+    report = json.dumps({
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'results': results,
+    }, indent=2)
+    if args.output:
+        args.output.write_text(report)
+    else:
+        print(report)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""In-process BM25 inverted index used for lexical and hybrid retrieval.
+
+Documents are keyed by caller-supplied integer ids (the same ids the FAISS
+index uses), and can be added and removed incrementally.
+"""
+import heapq
+import math
+import re
+from collections import Counter, defaultdict
+from operator import itemgetter
+
+# Keep part numbers and clause ids like "A-113.2" or "4.1(b)" together as one token
+TOKEN_PATTERN = re.compile(r'\w+(?:[-./]\w+)*')
+
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class BM25Index:
+    """Okapi BM25 over an inverted index of term -> {doc_id: term frequency}"""
+
+    def __init__(self, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings = defaultdict(dict)
+        self.doc_terms = {}  # doc_id -> its distinct terms, needed for removal
+        self.doc_len = {}
+        self.total_len = 0
+
+    def __len__(self):
+        return len(self.doc_terms)
+
+    def add(self, doc_id, text):
+        terms = Counter(tokenize(text))
+        self.doc_terms[doc_id] = tuple(terms)
+        self.doc_len[doc_id] = sum(terms.values())
+        self.total_len += self.doc_len[doc_id]
+        for term, tf in terms.items():
+            self.postings[term][doc_id] = tf
+
+    def add_many(self, doc_ids, texts):
+        for doc_id, text in zip(doc_ids, texts):
+            self.add(int(doc_id), text)
+
+    def remove(self, doc_id):
+        terms = self.doc_terms.pop(doc_id)
+        self.total_len -= self.doc_len.pop(doc_id)
+        for term in terms:
+            postings = self.postings[term]
+            del postings[doc_id]
+            if not postings:
+                del self.postings[term]
+
+    def search(self, query, k=3):
+        """Return up to k (doc_id, score) pairs, best first; docs sharing no term are skipped"""
+        n_docs = len(self.doc_terms)
+        if not n_docs:
+            return []
+        avg_len = self.total_len / n_docs
+        scores = defaultdict(float)
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            df = len(postings)
+            idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            for doc_id, tf in postings.items():
+                norm = self.k1 * (1 - self.b + self.b * self.doc_len[doc_id] / avg_len)
+                scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+        return heapq.nlargest(k, scores.items(), key=itemgetter(1))
@@ -0,0 +1,129 @@
+"""Per-column statistics for the dataset exploration pages.
+
+profile_columns computes everything those pages show (dtype, nulls,
+cardinality, top values, numeric summary) in one pass over the columns.
+fingerprint gives a cheap content key, and the cached_* wrappers cache the
+profile and histogram tables per key with st.cache_data, so reruns and page
+switches reuse them. Histograms are binned server-side and drawn by
+histogram_chart / counts_chart, so only the bin table is sent to the browser.
+"""
+import hashlib
+
+import altair as alt
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+QUANTILES = [0.25, 0.5, 0.75]
+MAX_CATEGORIES = 50  # bars drawn for a categorical column
+STAT_COLUMNS = ['dtype', 'kind', 'count', 'nulls', 'null_pct', 'unique',
+                'mean', 'std', 'min', '25%', '50%', '75%', 'max']
+
+
+def fingerprint(df):
+    """Hex digest of a DataFrame's columns, dtypes and values"""
+    digest = hashlib.sha256()
+    digest.update(repr(list(zip(df.columns, df.dtypes.astype(str)))).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def column_kind(series):
+    if pd.api.types.is_bool_dtype(series):
+        return 'categorical'
+    if pd.api.types.is_numeric_dtype(series):
+        return 'numeric'
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return 'datetime'
+    return 'categorical'
+
+
+def profile_columns(df, top_k=10):
+    """Return (stats, top_values)
+
+    stats: one row per column, indexed by column name, with STAT_COLUMNS
+    top_values: column name -> value counts of its top_k values, for non-numeric columns
+    """
+    rows = {}
+    top_values = {}
+    n_rows = len(df)
+    for name, series in df.items():
+        kind = column_kind(series)
+        values = series.dropna()
+        row = {
+            'dtype': str(series.dtype),
+            'kind': kind,
+            'count': len(values),
+            'nulls': n_rows - len(values),
+            'null_pct': round(100 * (n_rows - len(values)) / n_rows, 2) if n_rows else 0.0,
+        }
+        if kind == 'numeric':
+            array = values.to_numpy(dtype=float)
+            row['unique'] = len(np.unique(array))
+            if len(array):
+                q25, q50, q75 = np.quantile(array, QUANTILES)
+                row.update(mean=array.mean(), std=array.std(ddof=1) if len(array) > 1 else np.nan,
+                           min=array.min(), max=array.max(), **{'25%': q25, '50%': q50, '75%': q75})
+        else:
+            counts = values.value_counts()
+            row['unique'] = len(counts)
+            top_values[name] = counts.head(top_k)
+        rows[name] = row
+    stats = pd.DataFrame.from_dict(rows, orient='index').reindex(columns=STAT_COLUMNS)
+    return stats, top_values
+
+
+def columns_of_kind(stats, kind):
+    return list(stats.index[stats['kind'] == kind])
+
+
+def numeric_histogram(series, bins=30):
+    """Bin a numeric column server-side; returns one row per bin (bin_start, bin_end, count)"""
+    values = series.dropna().to_numpy(dtype=float)
+    counts, edges = np.histogram(values, bins=bins)
+    return pd.DataFrame({'bin_start': edges[:-1], 'bin_end': edges[1:], 'count': counts})
+
+
+def category_counts(series, limit=MAX_CATEGORIES):
+    """Counts of a column's most frequent values, at most limit rows (value, count)"""
+    counts = series.value_counts().head(limit)
+    return pd.DataFrame({'value': counts.index.astype(str), 'count': counts.to_numpy()})
+
+
+# Cached per dataset key; _df is not hashed, the key stands in for it
+@st.cache_data(show_spinner='Profiling columns...')
+def cached_profile(digest, _df, top_k=10):
+    return profile_columns(_df, top_k)
+
+
+@st.cache_data
+def cached_histogram(digest, column, _df, bins=30):
+    return numeric_histogram(_df[column], bins)
+
+
+@st.cache_data
+def cached_counts(digest, column, _df, limit=MAX_CATEGORIES):
+    return category_counts(_df[column], limit)
+
+
+def histogram_chart(bins, title, y_title='Count', height=300):
+    """Bar chart of a numeric_histogram table"""
+    return alt.Chart(bins).mark_bar().encode(
+        alt.X('bin_start:Q', title=title),
+        alt.X2('bin_end:Q'),
+        alt.Y('count:Q', title=y_title),
+        tooltip=[
+            alt.Tooltip('bin_start:Q', title='From'),
+            alt.Tooltip('bin_end:Q', title='To'),
+            alt.Tooltip('count:Q', title=y_title),
+        ],
+    ).properties(height=height)
+
+
+def counts_chart(counts, title, height=300):
+    """Bar chart of a category_counts table, most frequent first"""
+    return alt.Chart(counts).mark_bar().encode(
+        alt.X('value:N', title=title, sort='-y'),
+        alt.Y('count:Q', title='Count'),
+        tooltip=[alt.Tooltip('value:N', title=title), alt.Tooltip('count:Q', title='Count')],
+    ).properties(height=height)
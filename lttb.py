@@ -0,0 +1,67 @@
+"""Largest-Triangle-Three-Buckets downsampling for time-series charts.
+
+Charts only need a few thousand points to look identical to the full series,
+but shipping every observation to the browser costs serialization and render
+time on each rerun. LTTB keeps the first and last points and, from each of
+the buckets in between, the point forming the largest triangle with its
+neighbours, so peaks and troughs survive the downsampling.
+"""
+import numpy as np
+import pandas as pd
+
+MAX_CHART_POINTS = 2000
+
+
+def lttb_indices(x, y, threshold=MAX_CHART_POINTS):
+    """Return the sorted positions of the points LTTB keeps from (x, y)
+
+    x must be increasing; series at or below threshold points are kept whole.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    # Buckets over the interior points; the first and last points are always kept
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    kept = np.empty(threshold, dtype=int)
+    kept[0] = 0
+    kept[-1] = n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, stop = edges[i], edges[i + 1]
+        # Average of the next bucket (or the last point) is the triangle's third vertex
+        next_stop = edges[i + 2] if i + 2 < len(edges) else n
+        next_start = stop if i + 2 < len(edges) else n - 1
+        avg_x = x[next_start:next_stop].mean()
+        avg_y = y[next_start:next_stop].mean()
+        area = np.abs(
+            (x[a] - avg_x) * (y[start:stop] - y[a])
+            - (x[a] - x[start:stop]) * (avg_y - y[a])
+        )
+        a = start + int(area.argmax())
+        kept[i + 1] = a
+    return kept
+
+
+def downsample(df, x, y, threshold=MAX_CHART_POINTS, by=None):
+    """Rows of df LTTB keeps for plotting column y against x
+
+    x may be numeric, datetime or date objects; rows with a missing y are dropped.
+    With by, each group (e.g. one line per symbol) gets its own threshold points.
+    """
+    if df.empty:
+        return df
+    if by is not None:
+        return pd.concat(
+            [downsample(group, x, y, threshold) for _, group in df.groupby(by, sort=False)],
+            ignore_index=True,
+        )
+    df = df.dropna(subset=[y]).sort_values(x)
+    if len(df) <= threshold:
+        return df.reset_index(drop=True)
+    xs = df[x]
+    if not pd.api.types.is_numeric_dtype(xs):
+        xs = pd.to_datetime(xs).astype('int64')
+    return df.iloc[lttb_indices(xs.to_numpy(), df[y].to_numpy(), threshold)].reset_index(drop=True)
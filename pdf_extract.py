@@ -0,0 +1,72 @@
+"""Page-level PDF text extraction shared by the document Q&A app.
+
+Pages are parsed in batches across a process pool and yielded in page order
+as soon as each batch finishes, so downstream chunking/embedding can start
+on the first pages while later ones are still being parsed.
+
+The worker lives in its own module (not the Streamlit script) so it can be
+pickled and imported by fresh worker processes. The pool never forks the
+server directly: a Streamlit process runs many threads (Tornado, model
+loaders, tokenizer pools) and a child forked from it can deadlock. Workers
+come from a forkserver where available, otherwise they are spawned.
+"""
+import io
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import PyPDF2
+
+_reader = None
+
+
+def _init_worker(data):
+    global _reader
+    _reader = PyPDF2.PdfReader(io.BytesIO(data))
+
+
+def _extract_range(start, stop):
+    pages = []
+    for i in range(start, stop):
+        pages.append((i, _reader.pages[i].extract_text() or ''))
+    return pages
+
+
+def _mp_context():
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+
+
+def iter_pages(data, workers=None, batch_size=8, min_parallel_pages=16):
+    """Yield (page_number, text) for every non-empty page of a PDF, in order.
+
+    data: raw PDF bytes
+    workers: process count, defaults to os.cpu_count()
+    batch_size: pages handed to a worker per task
+    min_parallel_pages: below this page count the pool start-up isn't worth it
+    """
+    reader = PyPDF2.PdfReader(io.BytesIO(data))
+    n_pages = len(reader.pages)
+    workers = workers or os.cpu_count() or 1
+
+    if n_pages < min_parallel_pages or workers < 2:
+        for i, page in enumerate(reader.pages):
+            text = page.extract_text()
+            if text:
+                yield i, text
+        return
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=_mp_context(),
+        initializer=_init_worker,
+        initargs=(data,),
+    ) as pool:
+        futures = [
+            pool.submit(_extract_range, start, min(start + batch_size, n_pages))
+            for start in range(0, n_pages, batch_size)
+        ]
+        for future in futures:
+            for i, text in future.result():
+                if text:
+                    yield i, text